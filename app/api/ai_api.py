@@ -1,23 +1,49 @@
+import asyncio
 import os
 import uuid
-from typing import List, Dict, Optional
+from contextlib import aclosing
+from typing import List, Dict, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_db, SessionLocal
 from app.models.profile import Profile
 from app.models.shortlist import Shortlist
 from app.models.locked_university import LockedUniversity
 from app.models.university import University
 from app.models.user import User
 from app.models.cached_recommendation import CachedRecommendation
-from app.core.dependencies import get_current_user
+from app.core.sse import sse_event
+from app.core.dependencies import get_current_user, rate_limit, require_stage
 from app.core.stages import STAGE
-from app.services.gemini_service import get_gemini_recommendations
+from app.core.identity_cache import identity_cache
+from app.core.jwt import create_access_token
+from app.services.counsellor_context import counsellor_context_cache
+from app.core.config import GEMINI_LATENCY_BUDGET_SECONDS
+from app.services.catalog_index import search_catalog
+from app.services.gemini_service import get_gemini_recommendations_async, stream_gemini_recommendations_async
+from app.services.university_service import bulk_upsert_ai_universities
+from app.services.recommendation_jobs import get_precomputed_recommendations, has_active_job
+from app.services.recommendation_cache import (
+    profile_fingerprint,
+    get_cached_recommendations,
+    store_cached_recommendations,
+    shared_key_tuple,
+    get_shared_recommendations,
+    store_shared_recommendations,
+)
 
 router = APIRouter(prefix="/universities", tags=["University Discovery"])
 
+# Stage enforcement - allow discovery from DISCOVERY, SHORTLISTING, LOCKED, or APPLICATION stages
+require_discovery_stage = require_stage(
+    STAGE.DISCOVERY, STAGE.SHORTLISTING, STAGE.LOCKED, STAGE.APPLICATION,
+    detail="You must complete onboarding to access university discovery",
+)
+
 # ======================================================
 # 🔧 AI Provider Configuration
 # ======================================================
@@ -38,66 +64,13 @@ def _save_ai_universities_to_db(db: Session, universities: List[Dict], user_id:
     Save AI-generated universities to the database so they can be shortlisted.
     Returns the updated university list with database UUIDs.
     """
-    saved_universities = []
-    
-    for uni in universities:
-        uni_name = uni.get("name", "Unknown University")
-        
-        # Check if university already exists in database
-        existing = db.query(University).filter(University.name.ilike(uni_name)).first()
-        
-        if existing:
-            # Use existing university
-            saved_universities.append({
-                **uni,
-                "id": str(existing.id),
-            })
-        else:
-            # Create new university record
-            new_uni = University(
-                id=uuid.uuid4(),
-                name=uni_name,
-                country=uni.get("country", "Unknown"),
-                degree=uni.get("degree", "Bachelors"),
-                field=uni.get("field", "Various"),
-                tuition_min=int(uni.get("estimated_tuition", 20000)),
-                tuition_max=int(uni.get("estimated_tuition", 20000)) + 10000,
-                difficulty=uni.get("difficulty", "MEDIUM").upper(),
-                generated_by_ai=True,
-            )
-            db.add(new_uni)
-            db.flush()  # Get the ID without committing
-            
-            saved_universities.append({
-                **uni,
-                "id": str(new_uni.id),
-            })
-    
-    db.commit()
-    return saved_universities
+    return bulk_upsert_ai_universities(db, universities)
 
 
-@router.get("/discover")
-def discover_universities(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    """
-    Discover personalized university recommendations using AI based on user's profile.
-    Currently using Gemini API only (OpenRouter temporarily disabled).
-    """
-    # Stage enforcement - allow access from DISCOVERY, SHORTLISTING, LOCKED, or APPLICATION stages
-    allowed_stages = [STAGE.DISCOVERY, STAGE.SHORTLISTING, STAGE.LOCKED, STAGE.APPLICATION]
-    if user.stage not in allowed_stages:
-        raise HTTPException(
-            status_code=403,
-            detail="You must complete onboarding to access university discovery"
-        )
-
-    # Fetch profile
+def _get_profile(db: Session, user_id: uuid.UUID) -> Profile:
     profile = (
         db.query(Profile)
-        .filter(Profile.user_id == user.id)
+        .filter(Profile.user_id == user_id)
         .first()
     )
 
@@ -107,48 +80,168 @@ def discover_universities(
             detail="User profile not found"
         )
 
-    print(f"[University Discovery] Getting AI recommendations for user {user.id} (Provider: {AI_PROVIDER})")
-    
-    # Get university recommendations from Gemini API
-    universities = get_gemini_recommendations(
-        budget_range=profile.budget_range,
-        target_country=profile.target_country,
-        target_field=profile.target_field,
-        target_degree=profile.target_degree,
-        major=profile.major,
-    )
-    
-    if not universities:
-        raise HTTPException(
-            status_code=503,
-            detail="Unable to generate university recommendations. Please try again later."
-        )
+    # Detached, so later commits don't expire it and the request session can
+    # be closed while waiting on Gemini without making it unreadable
+    db.expunge(profile)
+    return profile
 
-    print(f"[University Discovery] AI returned {len(universities)} universities")
 
+# How often to re-check while a background job is generating this user's recommendations
+_JOB_POLL_INTERVAL_SECONDS = 0.5
+
+
+def _get_precomputed_universities(db: Session, user_id: uuid.UUID, profile: Profile) -> Optional[List[Dict]]:
+    """Serve recommendations produced by the background job, copying them into the per-user cache."""
+    fingerprint = profile_fingerprint(profile)
+    universities = get_precomputed_recommendations(db, user_id, fingerprint)
+    if universities is not None:
+        print(f"[University Discovery] Serving {len(universities)} precomputed universities for user {user_id}")
+        store_cached_recommendations(db, user_id, fingerprint, universities[:12])
+    return universities
+
+
+def _get_cached_universities(db: Session, user_id: uuid.UUID, profile: Profile) -> Optional[List[Dict]]:
+    """Look up recommendations in the per-user cache, the precomputed results, then the shared cache."""
+    # Serve repeat visits from the per-user cache while the profile is unchanged
+    fingerprint = profile_fingerprint(profile)
+    universities = get_cached_recommendations(db, user_id, fingerprint)
+    if universities is not None:
+        print(f"[University Discovery] Serving {len(universities)} cached universities for user {user_id}")
+        return universities
+
+    universities = _get_precomputed_universities(db, user_id, profile)
+    if universities is not None:
+        return universities
+
+    # Users with the same normalized inputs share one generated list
+    universities = get_shared_recommendations(db, shared_key_tuple(profile))
+    if universities is not None:
+        print(f"[University Discovery] Serving {len(universities)} shared universities for user {user_id}")
+        store_cached_recommendations(db, user_id, fingerprint, universities[:12])
+
+    return universities
+
+
+def _store_generated_universities(
+    db: Session,
+    user_id: uuid.UUID,
+    profile: Profile,
+    universities: List[Dict],
+) -> List[Dict]:
+    """Save freshly generated universities and populate both cache tiers."""
     # Save AI universities to database so they can be shortlisted
-    universities = _save_ai_universities_to_db(db, universities, user.id)
+    universities = _save_ai_universities_to_db(db, universities, user_id)
+    store_shared_recommendations(db, shared_key_tuple(profile), universities[:12])
+    store_cached_recommendations(db, user_id, profile_fingerprint(profile), universities[:12])
+    return universities
+
+
+def _poll_background_job(
+    db: Session,
+    user_id: uuid.UUID,
+    profile: Profile,
+    fingerprint: str,
+) -> Tuple[Optional[List[Dict]], bool]:
+    """
+    One check on the background job: (its recommendations if ready, whether it
+    is still running). The session is closed before returning so no pooled
+    connection is held while the caller sleeps.
+    """
+    try:
+        universities = _get_precomputed_universities(db, user_id, profile)
+        if universities is not None:
+            return universities, False
+        return None, has_active_job(db, user_id, fingerprint)
+    finally:
+        db.close()
+
+
+async def _wait_for_background_job(
+    db: Session,
+    user_id: uuid.UUID,
+    profile: Profile,
+    deadline: float,
+) -> Optional[List[Dict]]:
+    """
+    If a background job is already generating recommendations for this profile,
+    wait for its result (until `deadline`, in event loop time) instead of
+    issuing a second Gemini call.
+    """
+    fingerprint = profile_fingerprint(profile)
+    universities, running = await run_in_threadpool(_poll_background_job, db, user_id, profile, fingerprint)
+    if universities is not None or not running:
+        return universities
+
+    print(f"[University Discovery] Waiting for background job for user {user_id}")
+    loop = asyncio.get_running_loop()
+    while loop.time() < deadline:
+        await asyncio.sleep(_JOB_POLL_INTERVAL_SECONDS)
+        universities, running = await run_in_threadpool(_poll_background_job, db, user_id, profile, fingerprint)
+        if universities is not None:
+            return universities
+        if not running:
+            # The job failed or was superseded; generate inline
+            return None
+
+    return None
+
+
+async def _get_ai_recommendations(profile: Profile, deadline: Optional[float] = None) -> List[Dict]:
+    """
+    Ask Gemini for recommendations, giving up after GEMINI_LATENCY_BUDGET_SECONDS
+    or at `deadline` (event loop time) when the budget is shared with earlier steps.
+    """
+    timeout = GEMINI_LATENCY_BUDGET_SECONDS
+    if deadline is not None:
+        timeout = min(timeout, deadline - asyncio.get_running_loop().time())
+        if timeout <= 0:
+            print("[University Discovery] Latency budget already spent; skipping Gemini")
+            return []
 
+    try:
+        return await asyncio.wait_for(
+            get_gemini_recommendations_async(
+                budget_range=profile.budget_range,
+                target_country=profile.target_country,
+                target_field=profile.target_field,
+                target_degree=profile.target_degree,
+                major=profile.major,
+            ),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        print(f"[University Discovery] Gemini exceeded the {GEMINI_LATENCY_BUDGET_SECONDS}s latency budget")
+        return []
+
+
+def _format_university(uni: Dict, profile: Profile) -> Dict:
+    """Ensure all required fields are present on one recommendation."""
+    return {
+        "id": uni.get("id"),  # Database UUID once saved
+        "name": uni.get("name", "Unknown University"),
+        "country": uni.get("country", "Unknown"),
+        "degree": uni.get("degree", profile.target_degree or "Bachelors"),
+        "field": uni.get("field", profile.target_field or profile.major or "Various"),
+        "estimated_tuition": str(uni.get("estimated_tuition", 0)),
+        "difficulty": str(uni.get("difficulty", "MEDIUM")).upper(),
+        "is_shortlisted": False,
+    }
+
+
+def _format_discover_results(
+    db: Session,
+    user_id: uuid.UUID,
+    profile: Profile,
+    universities: List[Dict],
+) -> List[Dict]:
+    """Fill in defaults, mark the user's shortlisted universities and cap the list at 12."""
     # Process and enrich university data
-    result_universities = []
-    for uni in universities:
-        # Ensure all required fields are present
-        uni_data = {
-            "id": uni.get("id"),  # Now contains database UUID
-            "name": uni.get("name", "Unknown University"),
-            "country": uni.get("country", "Unknown"),
-            "degree": uni.get("degree", profile.target_degree or "Bachelors"),
-            "field": uni.get("field", profile.target_field or profile.major or "Various"),
-            "estimated_tuition": str(uni.get("estimated_tuition", 0)),
-            "difficulty": uni.get("difficulty", "MEDIUM").upper(),
-            "is_shortlisted": False,
-        }
-        result_universities.append(uni_data)
+    result_universities = [_format_university(uni, profile) for uni in universities]
 
     # Get shortlisted university IDs for this user
     shortlisted_ids = set(
-        s.university_id for s in 
-        db.query(Shortlist).filter(Shortlist.user_id == user.id).all()
+        str(s.university_id) for s in
+        db.query(Shortlist).filter(Shortlist.user_id == user_id).all()
     )
     
     # Mark shortlisted universities
@@ -157,16 +250,184 @@ def discover_universities(
             uni["is_shortlisted"] = True
     
     # Limit to 12 universities
-    result_universities = result_universities[:12]
+    return result_universities[:12]
+
+
+@router.get("/discover", dependencies=[Depends(require_discovery_stage), Depends(rate_limit("discover"))])
+async def discover_universities(
+    fast: bool = Query(False, description="Return catalog matches only, without calling the AI"),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Discover personalized university recommendations using AI based on user's profile.
+    Currently using Gemini API only (OpenRouter temporarily disabled).
+
+    Async so that the Gemini wait does not hold a threadpool slot; the short
+    DB steps run in the threadpool instead of on the event loop. If Gemini
+    fails or exceeds its latency budget, matches from the in-memory catalog
+    index are returned instead.
+
+    Recommendations are normally precomputed by the background job queued at
+    onboarding / profile update; if that job is still running, this waits for
+    it rather than calling Gemini a second time. The job wait and the Gemini
+    call share one latency budget, so a slow job is not followed by a second
+    full-length wait.
+
+    The request session is closed before every wait (job polling, Gemini) so
+    a pooled connection is only held while a query actually runs; the later
+    DB steps start a fresh transaction on the same session.
+    """
+    user_id = user.id
+
+    # Fetch profile
+    profile = await run_in_threadpool(_get_profile, db, user_id)
+
+    source = f"ai_recommendation_{AI_PROVIDER}"
+    from_cache = False
+    deadline = asyncio.get_running_loop().time() + GEMINI_LATENCY_BUDGET_SECONDS
+
+    if fast:
+        universities = await run_in_threadpool(search_catalog, db, profile)
+        source = "catalog"
+    else:
+        universities = await run_in_threadpool(_get_cached_universities, db, user_id, profile)
+        if universities is None:
+            universities = await _wait_for_background_job(db, user_id, profile, deadline)
+        from_cache = universities is not None
+
+    if universities is None:
+        print(f"[University Discovery] Getting AI recommendations for user {user_id} (Provider: {AI_PROVIDER})")
+
+        # Give the connection back to the pool for the length of the Gemini call
+        await run_in_threadpool(db.close)
+
+        # Get university recommendations from Gemini API with whatever budget is left
+        universities = await _get_ai_recommendations(profile, deadline)
+
+        if universities:
+            print(f"[University Discovery] AI returned {len(universities)} universities")
+            universities = await run_in_threadpool(_store_generated_universities, db, user_id, profile, universities)
+        else:
+            print(f"[University Discovery] Falling back to catalog matches for user {user_id}")
+            universities = await run_in_threadpool(search_catalog, db, profile)
+            source = "catalog"
+
+    if not universities:
+        raise HTTPException(
+            status_code=503,
+            detail="Unable to generate university recommendations. Please try again later."
+        )
+
+    result_universities = await run_in_threadpool(_format_discover_results, db, user_id, profile, universities)
     
     return {
         "count": len(result_universities),
         "universities": result_universities,
-        "cached": False,
-        "source": f"ai_recommendation_{AI_PROVIDER}"
+        "cached": from_cache,
+        "source": source
     }
 
 
+def _finish_streamed_discovery(user_id: uuid.UUID, profile: Profile, universities: List[Dict]):
+    """
+    Save streamed universities (or fall back to catalog matches) with its own
+    session, since the request session is closed once streaming starts.
+    Returns (formatted universities, source).
+    """
+    db = SessionLocal()
+    try:
+        source = f"ai_recommendation_{AI_PROVIDER}"
+        if universities:
+            universities = _store_generated_universities(db, user_id, profile, universities)
+        else:
+            print(f"[University Discovery] Falling back to catalog matches for user {user_id}")
+            universities = search_catalog(db, profile)
+            source = "catalog"
+        return _format_discover_results(db, user_id, profile, universities), source
+    finally:
+        db.close()
+
+
+@router.get("/discover/stream", dependencies=[Depends(require_discovery_stage), Depends(rate_limit("discover"))])
+async def discover_universities_stream(
+    http_request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Streaming variant of /discover over Server-Sent Events.
+
+    Events:
+    - `university`: one recommendation, sent as soon as Gemini finishes
+      generating it (its "id" is null until saved)
+    - `done`: the final list with database ids and shortlist flags, plus
+      "cached" and "source" as in /discover
+    - `error`: no recommendations could be produced
+
+    Cached and precomputed results are sent immediately.
+    """
+    user_id = user.id
+    profile = await run_in_threadpool(_get_profile, db, user_id)
+
+    cached = await run_in_threadpool(_get_cached_universities, db, user_id, profile)
+    cached_results = None
+    if cached:
+        cached_results = await run_in_threadpool(_format_discover_results, db, user_id, profile, cached)
+
+    # The get_db teardown only runs after the stream ends; release the connection now
+    await run_in_threadpool(db.close)
+
+    async def event_stream():
+        if cached_results is not None:
+            for uni in cached_results:
+                yield sse_event("university", uni)
+            yield sse_event("done", {
+                "count": len(cached_results),
+                "universities": cached_results,
+                "cached": True,
+                "source": f"ai_recommendation_{AI_PROVIDER}",
+            })
+            return
+
+        print(f"[University Discovery] Streaming AI recommendations for user {user_id}")
+        universities = []
+        stream = stream_gemini_recommendations_async(
+            budget_range=profile.budget_range,
+            target_country=profile.target_country,
+            target_field=profile.target_field,
+            target_degree=profile.target_degree,
+            major=profile.major,
+        )
+        async with aclosing(stream):
+            async for uni in stream:
+                if await http_request.is_disconnected():
+                    print(f"[University Discovery] Client disconnected from stream for user {user_id}")
+                    return
+                universities.append(uni)
+                yield sse_event("university", _format_university(uni, profile))
+
+        results, source = await run_in_threadpool(_finish_streamed_discovery, user_id, profile, universities)
+        if not results:
+            yield sse_event("error", {
+                "detail": "Unable to generate university recommendations. Please try again later."
+            })
+            return
+
+        yield sse_event("done", {
+            "count": len(results),
+            "universities": results,
+            "cached": False,
+            "source": source,
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/lock/{university_id}")
 def lock_university_by_name(
     university_id: str,
@@ -228,65 +489,52 @@ def lock_university_by_name(
     # Transition to LOCKED stage
     user.stage = STAGE.LOCKED
     db.commit()
+    identity_cache.invalidate(user.id)
+    counsellor_context_cache.invalidate(user.id)
 
-    return {"message": "University locked", "locked_university": uni_data, "stage": user.stage}
+    return {
+        "message": "University locked",
+        "locked_university": uni_data,
+        "stage": user.stage,
+        # The stage changed, so the old token's stage claim is stale
+        "access_token": create_access_token(user.id, user.email, user.stage),
+        "token_type": "bearer",
+    }
 
 
-@router.post('/discover/refresh')
-def refresh_discovery(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    """
-    Clear cached recommendations and fetch fresh ones from AI.
-    Currently using Gemini API only (OpenRouter temporarily disabled).
-    """
-    # Allow refresh from DISCOVERY, SHORTLISTING, LOCKED, or APPLICATION stages
-    allowed_stages = [STAGE.DISCOVERY, STAGE.SHORTLISTING, STAGE.LOCKED, STAGE.APPLICATION]
-    if user.stage not in allowed_stages:
-        raise HTTPException(status_code=403, detail="You must complete onboarding to access university discovery")
-
+def _clear_previous_recommendations(db: Session, user_id: uuid.UUID) -> set:
+    """Drop the user's cached recommendations and return the names that were shown."""
     # Get previously shown university IDs to exclude them
     previous_cached = (
         db.query(CachedRecommendation)
-        .filter(CachedRecommendation.user_id == user.id)
+        .filter(CachedRecommendation.user_id == user_id)
         .all()
     )
     previous_university_names = set(rec.university_name for rec in previous_cached)
 
     # Clear existing cached recommendations for this user
-    db.query(CachedRecommendation).filter(CachedRecommendation.user_id == user.id).delete()
+    db.query(CachedRecommendation).filter(CachedRecommendation.user_id == user_id).delete()
     db.commit()
 
-    # Fetch profile
-    profile = db.query(Profile).filter(Profile.user_id == user.id).first()
-    if not profile:
-        raise HTTPException(status_code=400, detail="User profile not found")
-
-    print(f"[University Discovery] Refreshing AI recommendations for user {user.id} (Provider: {AI_PROVIDER})")
-    
-    # Get fresh university recommendations from Gemini API
-    universities = get_gemini_recommendations(
-        budget_range=profile.budget_range,
-        target_country=profile.target_country,
-        target_field=profile.target_field,
-        target_degree=profile.target_degree,
-        major=profile.major,
-    )
+    return previous_university_names
 
-    if not universities:
-        raise HTTPException(
-            status_code=503,
-            detail="Unable to generate university recommendations. Please try again later."
-        )
 
+def _store_refreshed_universities(
+    db: Session,
+    user_id: uuid.UUID,
+    profile: Profile,
+    universities: List[Dict],
+    previous_university_names: set,
+    cache_result: bool = True,
+) -> List[Dict]:
+    """Save refreshed universities, drop ones already shown or shortlisted, and cache the result."""
     # Save AI universities to database so they can be shortlisted
-    universities = _save_ai_universities_to_db(db, universities, user.id)
+    universities = _save_ai_universities_to_db(db, universities, user_id)
 
     # Get shortlisted university IDs for this user
     shortlisted_ids = set(
-        s.university_id for s in
-        db.query(Shortlist).filter(Shortlist.user_id == user.id).all()
+        str(s.university_id) for s in
+        db.query(Shortlist).filter(Shortlist.user_id == user_id).all()
     )
 
     # Process and filter universities
@@ -339,11 +587,63 @@ def refresh_discovery(
     # Limit to 12 universities
     result_universities = result_universities[:12]
 
+    # Cache the refreshed list so the next discover visit serves it
+    if cache_result:
+        store_cached_recommendations(db, user_id, profile_fingerprint(profile), result_universities)
+
+    return result_universities
+
+
+@router.post('/discover/refresh', dependencies=[Depends(require_discovery_stage), Depends(rate_limit("refresh"))])
+async def refresh_discovery(
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Clear cached recommendations and fetch fresh ones from AI.
+    Currently using Gemini API only (OpenRouter temporarily disabled).
+    """
+    user_id = user.id
+    previous_university_names = await run_in_threadpool(_clear_previous_recommendations, db, user_id)
+
+    # Fetch profile
+    profile = await run_in_threadpool(_get_profile, db, user_id)
+
+    print(f"[University Discovery] Refreshing AI recommendations for user {user_id} (Provider: {AI_PROVIDER})")
+
+    # Give the connection back to the pool for the length of the Gemini call
+    await run_in_threadpool(db.close)
+    
+    # Get fresh university recommendations from Gemini API
+    universities = await _get_ai_recommendations(profile)
+    source = f"ai_recommendation_{AI_PROVIDER}"
+
+    if not universities:
+        # Fall back to catalog matches; these are not cached as AI results
+        universities = await run_in_threadpool(search_catalog, db, profile, 24)
+        source = "catalog"
+
+    if not universities:
+        raise HTTPException(
+            status_code=503,
+            detail="Unable to generate university recommendations. Please try again later."
+        )
+
+    result_universities = await run_in_threadpool(
+        _store_refreshed_universities,
+        db,
+        user_id,
+        profile,
+        universities,
+        previous_university_names,
+        source != "catalog",
+    )
+
     return {
         "count": len(result_universities),
         "universities": result_universities,
         "cached": False,
-        "source": f"ai_recommendation_{AI_PROVIDER}"
+        "source": source
     }
 
 
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-import time
-from collections import defaultdict, deque
-import requests
-import os
+from contextlib import aclosing
 import json
 from pydantic import BaseModel
 from typing import List, Optional
@@ -14,39 +14,29 @@ class ChatRequest(BaseModel):
 
 class ChatHistoryResponse(BaseModel):
     messages: List[dict]
-    conversation_id: str
+    conversation_id: Optional[str]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
-from app.db.session import get_db
+from app.db.session import get_db, SessionLocal
+from app.db.replica import get_async_read_db
 from app.models.user import User
 from app.models.profile import Profile
 from app.models.locked_university import LockedUniversity
-from app.models.shortlist import Shortlist
-from app.models.university import University
 from app.models.ai_counsellor_chat import AICounsellorChat
-from app.core.dependencies import get_current_user
+from app.core.sse import sse_event
+from app.core.dependencies import get_current_user, get_current_user_async, rate_limit
+from app.services.shortlist_service import get_user_shortlist, university_summary
+from app.services.counsellor_context import counsellor_context_cache
+from app.services.conversation_memory import build_history, schedule_summary
+from app.services.chat_history import DEFAULT_PAGE_SIZE, InvalidCursor, get_history_page_async
+from app.services.ai_service import chat_completion_async, chat_completion_stream, AIProviderError
 import uuid
 
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+COUNSELLOR_MODEL = "openai/gpt-oss-20b:free"
 
 router = APIRouter(prefix="/ai", tags=["AI Counsellor"])
 
-# Simple rate limiter per user (3 requests per 2 minutes)
-RATE_LIMIT = 3
-RATE_WINDOW = 120
-_user_ai_requests = defaultdict(deque)
-
-
-def check_ai_rate_limit(user_id):
-    now = time.time()
-    window_start = now - RATE_WINDOW
-    requests_q = _user_ai_requests[user_id]
-    while requests_q and requests_q[0] < window_start:
-        requests_q.popleft()
-    if len(requests_q) >= RATE_LIMIT:
-        raise HTTPException(status_code=429, detail="Too many AI requests. Try again later.")
-    requests_q.append(now)
-
 
 def get_user_context(db, user):
     """Get user profile and context for AI"""
@@ -58,24 +48,12 @@ def get_user_context(db, user):
         .first()
     )
 
-    shortlist_items = (
-        db.query(Shortlist)
-        .filter(Shortlist.user_id == user.id)
-        .all()
-    )
-
+    # Shortlist with its universities in one query
     shortlisted = []
-    for s in shortlist_items:
-        u = db.query(University).filter(University.id == s.university_id).first()
-        if u:
-            shortlisted.append({
-                "name": u.name,
-                "country": u.country,
-                "degree": u.degree,
-                "field": u.field,
-                "estimated_tuition": (u.tuition_min + u.tuition_max) // 2,
-                "difficulty": u.difficulty,
-            })
+    for item in get_user_shortlist(db, user.id):
+        summary = university_summary(item.university)
+        summary.pop("id")
+        shortlisted.append(summary)
 
     locked_data = locked.university_data if locked and getattr(locked, 'university_data', None) else None
 
@@ -112,9 +90,28 @@ Provide helpful, personalized advice about their university application. Be enco
 """
 
 
-def get_greeting_message(profile):
+def get_counsellor_context(db, user):
+    """
+    Rendered system prompt and greeting name for the user, from the per-user
+    cache when possible (no queries on a hit).
+    """
+    cached = counsellor_context_cache.get(user.id)
+    if cached is not None:
+        return cached
+
+    context = get_user_context(db, user)
+    profile = context["profile"]
+    rendered = {
+        "system_prompt": build_system_prompt(profile, context["locked_data"], context["shortlisted"]),
+        "first_name": profile.first_name if profile else None,
+    }
+    counsellor_context_cache.put(user.id, rendered)
+    return rendered
+
+
+def get_greeting_message(first_name):
     """Generate a personalized greeting message"""
-    name = profile.first_name if profile else "there"
+    name = first_name or "there"
     return f"""Hi {name}! 👋
 
 I'm your AI Counsellor, here to help you with your study abroad journey. 
@@ -129,90 +126,52 @@ What would you like to know today?"""
 
 
 @router.get("/counsellor/history")
-def get_chat_history(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+async def get_chat_history(
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    conversation_id: Optional[uuid.UUID] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
 ):
-    """Get user's chat history"""
-    # Get all conversations for user, ordered by most recent
-    chats = (
-        db.query(AICounsellorChat)
-        .filter(AICounsellorChat.user_id == user.id)
-        .order_by(AICounsellorChat.created_at.desc())
-        .all()
-    )
-    
-    if not chats:
-        return {"messages": [], "conversation_id": None}
-    
-    # Get the most recent conversation_id
-    latest_chat = chats[0]
-    conversation_id = str(latest_chat.conversation_id)
-    
-    # Get all messages for this conversation
-    conversation_chats = (
-        db.query(AICounsellorChat)
-        .filter(
-            AICounsellorChat.user_id == user.id,
-            AICounsellorChat.conversation_id == latest_chat.conversation_id
-        )
-        .order_by(AICounsellorChat.created_at.asc())
-        .all()
-    )
-    
-    messages = [
-        {
-            "id": str(chat.id),
-            "role": chat.role,
-            "content": chat.content,
-            "timestamp": chat.created_at.isoformat()
-        }
-        for chat in conversation_chats
-    ]
-    
-    return {
-        "messages": messages,
-        "conversation_id": conversation_id
-    }
-
-
-@router.post("/counsellor/chat")
-def counsellor_chat(
-    request: ChatRequest,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    # Rate limit
-    check_ai_rate_limit(user.id)
-    
-    # Get or create conversation ID
-    if request.conversation_id:
-        conversation_id = uuid.UUID(request.conversation_id)
-    else:
-        conversation_id = uuid.uuid4()
-    
-    # Get user context
-    context = get_user_context(db, user)
+    """
+    Get user's chat history, newest page first (of the latest conversation
+    unless `conversation_id` is given). Pass `next_cursor` back as `cursor`
+    to load older messages.
+    """
+    try:
+        return await get_history_page_async(db, user.id, conversation_id, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _prepare_chat(db: Session, user: User, message: str, conversation_id: uuid.UUID) -> dict:
+    """
+    Save the user's message and build the provider messages for the reply.
+    For a brand-new user the greeting is saved and returned instead.
+    """
+    # Get user context (cached per user)
+    context = get_counsellor_context(db, user)
     
     # Check if this is a new conversation (no messages yet)
-    existing_chats = (
-        db.query(AICounsellorChat)
+    has_chats = (
+        db.query(AICounsellorChat.id)
         .filter(AICounsellorChat.user_id == user.id)
-        .count()
-    )
+        .limit(1)
+        .first()
+    ) is not None
     
     # Save user message
     user_chat = AICounsellorChat(
         user_id=user.id,
         conversation_id=conversation_id,
         role="user",
-        content=request.message
+        content=message
     )
     db.add(user_chat)
     
     # If new conversation, generate and save greeting first
-    if existing_chats == 0:
-        greeting = get_greeting_message(context["profile"])
+    if not has_chats:
+        greeting = get_greeting_message(context["first_name"])
         greeting_chat = AICounsellorChat(
             user_id=user.id,
             conversation_id=conversation_id,
@@ -222,79 +181,162 @@ def counsellor_chat(
         db.add(greeting_chat)
         db.commit()
         
-        return {
-            "response": greeting,
-            "conversation_id": str(conversation_id),
-            "is_new_conversation": True
-        }
+        return {"greeting": greeting, "messages": None, "needs_summary": False}
     
     db.commit()
     
-    # Build system prompt
-    system_prompt = build_system_prompt(
-        context["profile"],
-        context["locked_data"],
-        context["shortlisted"]
-    )
-    
-    # Get chat history for context
-    history = (
-        db.query(AICounsellorChat)
-        .filter(
-            AICounsellorChat.user_id == user.id,
-            AICounsellorChat.conversation_id == conversation_id
-        )
-        .order_by(AICounsellorChat.created_at.asc())
-        .limit(10)  # Last 10 messages
-        .all()
+    # Rolling summary of older turns plus the newest turns within the token budget
+    history, needs_summary = build_history(db, user.id, conversation_id)
+    messages = [{"role": "system", "content": context["system_prompt"]}, *history]
+
+    # End the read transaction so no pooled connection is held while the caller waits on the LLM
+    db.close()
+
+    return {"greeting": None, "messages": messages, "needs_summary": needs_summary}
+
+
+def _save_assistant_message(db: Session, user_id, conversation_id: uuid.UUID, content: str) -> None:
+    ai_chat = AICounsellorChat(
+        user_id=user_id,
+        conversation_id=conversation_id,
+        role="assistant",
+        content=content
     )
-    
-    # Build messages for API
-    messages = [{"role": "system", "content": system_prompt}]
-    for chat in history:
-        messages.append({"role": chat.role, "content": chat.content})
-    
-    # Call OpenRouter
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": "openai/gpt-oss-20b:free",
-        "messages": messages,
-        "temperature": 0.7,
-        "max_tokens": 500,
-    }
+    db.add(ai_chat)
+    db.commit()
+
+
+@router.post("/counsellor/chat", dependencies=[Depends(rate_limit("chat"))])
+async def counsellor_chat(
+    request: ChatRequest,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    # Get or create conversation ID
+    if request.conversation_id:
+        conversation_id = uuid.UUID(request.conversation_id)
+    else:
+        conversation_id = uuid.uuid4()
+
+    user_id = user.id
+    prepared = await run_in_threadpool(_prepare_chat, db, user, request.message, conversation_id)
 
+    if prepared["greeting"] is not None:
+        return {
+            "response": prepared["greeting"],
+            "conversation_id": str(conversation_id),
+            "is_new_conversation": True
+        }
+
+    # Call OpenRouter without holding a threadpool slot
     try:
-        resp = requests.post(OPENROUTER_URL, headers=headers, json=payload, timeout=30)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=502, detail="AI provider error")
-        data = resp.json()
-        response_text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        response_text = await chat_completion_async(
+            prepared["messages"],
+            model=COUNSELLOR_MODEL,
+            temperature=0.7,
+            max_tokens=500,
+        )
 
         # Save AI response
-        ai_chat = AICounsellorChat(
-            user_id=user.id,
-            conversation_id=conversation_id,
-            role="assistant",
-            content=response_text
-        )
-        db.add(ai_chat)
-        db.commit()
+        await run_in_threadpool(_save_assistant_message, db, user_id, conversation_id, response_text)
+        if prepared["needs_summary"]:
+            # Fold turns that no longer fit the prompt window into the conversation summary
+            schedule_summary(user_id, conversation_id)
 
         return {
             "response": response_text,
             "conversation_id": str(conversation_id),
             "is_new_conversation": False
         }
-    except HTTPException:
-        raise
+    except AIProviderError:
+        raise HTTPException(status_code=502, detail="AI provider error")
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"AI request failed: {e}")
 
 
+def _persist_assistant_message(user_id, conversation_id: uuid.UUID, content: str) -> None:
+    """Save a streamed reply with its own session; the request session is closed once streaming starts."""
+    db = SessionLocal()
+    try:
+        _save_assistant_message(db, user_id, conversation_id, content)
+    finally:
+        db.close()
+
+
+@router.post("/counsellor/chat/stream", dependencies=[Depends(rate_limit("chat"))])
+async def counsellor_chat_stream(
+    request: ChatRequest,
+    http_request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Stream the counsellor reply as Server-Sent Events.
+
+    Emits `token` events with content deltas as they arrive from the provider,
+    then a `done` event once the assistant message has been saved. An `error`
+    event is sent if the provider fails. If the client disconnects, the
+    upstream request is closed and nothing is saved.
+    """
+    # Get or create conversation ID
+    if request.conversation_id:
+        conversation_id = uuid.UUID(request.conversation_id)
+    else:
+        conversation_id = uuid.uuid4()
+
+    user_id = user.id
+    prepared = await run_in_threadpool(_prepare_chat, db, user, request.message, conversation_id)
+
+    async def event_stream():
+        if prepared["greeting"] is not None:
+            yield sse_event("token", {"content": prepared["greeting"]})
+            yield sse_event("done", {
+                "conversation_id": str(conversation_id),
+                "is_new_conversation": True,
+            })
+            return
+
+        chunks = []
+        try:
+            stream = chat_completion_stream(
+                prepared["messages"],
+                model=COUNSELLOR_MODEL,
+                temperature=0.7,
+                max_tokens=500,
+            )
+            async with aclosing(stream):
+                async for delta in stream:
+                    if await http_request.is_disconnected():
+                        print(f"[AI Counsellor] Client disconnected from stream for user {user_id}")
+                        return
+                    chunks.append(delta)
+                    yield sse_event("token", {"content": delta})
+        except AIProviderError:
+            yield sse_event("error", {"detail": "AI provider error"})
+            return
+        except Exception as e:
+            yield sse_event("error", {"detail": f"AI request failed: {e}"})
+            return
+
+        # Save AI response once the stream has completed
+        response_text = "".join(chunks)
+        await run_in_threadpool(_persist_assistant_message, user_id, conversation_id, response_text)
+        if prepared["needs_summary"]:
+            schedule_summary(user_id, conversation_id)
+
+        yield sse_event("done", {
+            "conversation_id": str(conversation_id),
+            "is_new_conversation": False,
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/counsellor/new-conversation")
 def start_new_conversation(
     db: Session = Depends(get_db),
@@ -302,13 +344,13 @@ def start_new_conversation(
 ):
     """Start a new conversation with a fresh greeting"""
     # Get user context
-    context = get_user_context(db, user)
+    context = get_counsellor_context(db, user)
     
     # Generate new conversation ID
     conversation_id = uuid.uuid4()
     
     # Generate and save greeting
-    greeting = get_greeting_message(context["profile"])
+    greeting = get_greeting_message(context["first_name"])
     greeting_chat = AICounsellorChat(
         user_id=user.id,
         conversation_id=conversation_id,
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 
+from app.core.config import INTERNAL_METRICS_TOKEN
+
 from app.api.auth import router as auth_router
 from app.api.onboarding import router as onboarding_router
 from app.api.ai_api import router as universities_router
@@ -8,6 +10,7 @@ from app.api.applications_api import router as applications_router
 from app.api.ai_counsellor import router as ai_counsellor_router
 from app.api.tasks_api import router as tasks_router
 from app.api.dashboard_api import router as dashboard_router
+from app.api.metrics_api import router as metrics_router
 
 api_router = APIRouter()
 
@@ -19,3 +22,5 @@ api_router.include_router(applications_router)
 api_router.include_router(ai_counsellor_router)
 api_router.include_router(tasks_router)
 api_router.include_router(dashboard_router)
+if INTERNAL_METRICS_TOKEN:
+    api_router.include_router(metrics_router)
@@ -8,13 +8,16 @@ import shutil
 from datetime import datetime, timezone
 
 from app.db.session import get_db
+from app.db.replica import get_read_db
 from app.models.application_checklist import ApplicationChecklist, ChecklistItemStatus
 from app.models.locked_university import LockedUniversity
 from app.models.university import University
 from app.models.user import User
 from app.models.application_document import ApplicationDocument, SOPDraft
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, rate_limit
 from app.core.stages import STAGE
+from app.core.identity_cache import identity_cache
+from app.core.jwt import create_access_token
 from app.services.ai_service import ask_ai
 
 router = APIRouter(prefix="/applications", tags=["Applications"])
@@ -89,7 +92,7 @@ def initialize_application_checklist(
 # =========================
 @router.get("/checklist")
 def get_application_checklist(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
 ):
     """Get application checklist for current user."""
@@ -250,11 +253,21 @@ def complete_task(
     db.commit()
 
     # Transition user to APPLICATION stage if currently LOCKED
+    stage_changed = False
     if user.stage == STAGE.LOCKED:
         user.stage = STAGE.APPLICATION
         db.commit()
+        identity_cache.invalidate(user.id)
+        stage_changed = True
+
+    response = {"message": "Task marked complete", "task": item.item_name, "stage": user.stage}
+
+    # Return new token if stage changed
+    if stage_changed:
+        response["access_token"] = create_access_token(user.id, user.email, user.stage)
+        response["token_type"] = "bearer"
 
-    return {"message": "Task marked complete", "task": item.item_name, "stage": user.stage}
+    return response
 
 
 # =========================
@@ -582,7 +595,7 @@ def update_sop_draft(
     }
 
 
-@router.post("/sop/generate")
+@router.post("/sop/generate", dependencies=[Depends(rate_limit("sop"))])
 def generate_sop_with_ai(
     prompt: str = Form(...),
     db: Session = Depends(get_db),
@@ -625,6 +638,10 @@ def generate_sop_with_ai(
     - Professional and academic tone
     """
 
+    # End the read transaction so no pooled connection is held during the AI call
+    user_id = user.id
+    db.close()
+
     try:
         generated_sop = ask_ai(ai_prompt)
     except Exception as e:
@@ -632,7 +649,7 @@ def generate_sop_with_ai(
 
     # Create draft
     draft = SOPDraft(
-        user_id=user.id,
+        user_id=user_id,
         title=f"SOP Draft - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
         content=generated_sop,
         version=1,
@@ -13,6 +13,7 @@ from app.db.session import SessionLocal
 from app.core.jwt import create_access_token
 from app.core.dependencies import get_current_user
 from app.core.stages import STAGE
+from app.core.identity_cache import identity_cache
 from app.models.user import User
 from app.models.profile import Profile
 
@@ -166,6 +167,7 @@ def set_user_stage(
     old_stage = user.stage
     user.stage = stage_enum
     db.commit()
+    identity_cache.invalidate(user.id)
     
     # Create new token with updated stage
     access_token = create_access_token(
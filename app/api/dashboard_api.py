@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Dict, Any
 
-from app.db.session import get_db
+from app.db.replica import get_async_read_db
 from app.models.user import User
 from app.models.profile import Profile
 from app.models.shortlist import Shortlist
 from app.models.task import Task
 from app.models.locked_university import LockedUniversity
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user_async
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -29,28 +30,40 @@ class DashboardResponse(BaseModel):
     journey_steps: list
 
 @router.get("/", response_model=DashboardResponse)
-def get_dashboard_data(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+async def get_dashboard_data(
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
 ):
     """Get dashboard data for the current user."""
 
-    # Get user profile
-    profile = db.query(Profile).filter(Profile.user_id == user.id).first()
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
+    # Profile and all three counts in one round trip
+    shortlisted = (
+        select(func.count()).select_from(Shortlist)
+        .where(Shortlist.user_id == user.id)
+        .scalar_subquery()
+    )
+    locked = (
+        select(func.count()).select_from(LockedUniversity)
+        .where(LockedUniversity.user_id == user.id)
+        .scalar_subquery()
+    )
+    # Pending tasks (using correct status values)
+    pending_tasks = (
+        select(func.count()).select_from(Task)
+        .where(Task.user_id == user.id, Task.status.in_(['todo', 'in_progress']))
+        .scalar_subquery()
+    )
 
-    # Get shortlist count
-    shortlisted_count = db.query(Shortlist).filter(Shortlist.user_id == user.id).count()
-    
-    # Get locked universities count from LockedUniversity table
-    locked_count = db.query(LockedUniversity).filter(LockedUniversity.user_id == user.id).count()
+    row = (
+        await db.execute(
+            select(Profile, shortlisted, locked, pending_tasks)
+            .where(Profile.user_id == user.id)
+        )
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Profile not found")
 
-    # Get pending tasks (using correct status values)
-    pending_tasks_count = db.query(Task).filter(
-        Task.user_id == user.id,
-        Task.status.in_(['todo', 'in_progress'])
-    ).count()
+    profile, shortlisted_count, locked_count, pending_tasks_count = row
 
     # Calculate profile strength (simplified)
     profile_strength = 100 if profile.is_complete else 75
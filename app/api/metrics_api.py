@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+
+from app.core.dependencies import require_internal_token
+from app.core.identity_cache import identity_cache
+from app.core.rate_limit import rate_limiter
+from app.db.session import engine
+from app.db.instrumentation import route_sql_metrics
+from app.db.replica import replica_engine, replica_router
+from app.services.single_flight import llm_single_flight
+from app.services.catalog_index import catalog_index
+from app.services.http_client import http_clients
+from app.services.counsellor_context import counsellor_context_cache
+from app.services.gemini_service import gemini_models
+
+# Operational data only; requires the internal token (and is only mounted when one is configured)
+router = APIRouter(prefix="/internal", tags=["Internal"], dependencies=[Depends(require_internal_token)])
+
+
+@router.get("/metrics")
+def get_internal_metrics():
+    """Operational counters for this worker process."""
+    return {
+        "llm_single_flight": llm_single_flight.stats(),
+        "catalog_index": catalog_index.stats(),
+        "gemini_models": gemini_models.stats(),
+        "db_pool": engine.pool.stats(),
+        "identity_cache": identity_cache.stats(),
+        "counsellor_context_cache": counsellor_context_cache.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "http_clients": http_clients.stats(),
+        "sql_by_route": route_sql_metrics.stats(),
+        "replica": {
+            **replica_router.stats(),
+            "pool": replica_engine.pool.stats() if replica_engine is not None else None,
+        },
+    }
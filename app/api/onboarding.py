@@ -7,7 +7,14 @@ from app.models.user import User
 from app.core.dependencies import get_current_user
 from app.schemas.profile import OnboardingRequest
 from app.core.stages import STAGE
+from app.core.identity_cache import identity_cache
+from app.services.counsellor_context import counsellor_context_cache
 from app.core.jwt import create_access_token
+from app.services.recommendation_cache import (
+    profile_fingerprint,
+    invalidate_cached_recommendations,
+)
+from app.services.recommendation_jobs import enqueue_recommendation_job
 
 router = APIRouter(prefix="/onboarding", tags=["Onboarding"])
 
@@ -56,8 +63,14 @@ def complete_onboarding(
 
     db.add(profile)
     db.add(user)
+
+    # Precompute recommendations so the discovery screen is ready when the user gets there
+    enqueue_recommendation_job(db, user.id, profile_fingerprint(profile))
+
     db.commit()
     db.refresh(user)
+    identity_cache.invalidate(user.id)
+    counsellor_context_cache.invalidate(user.id)
 
     # ✅ Generate new token with updated stage
     new_token = create_access_token(user.id, user.email, user.stage)
@@ -90,6 +103,8 @@ def update_profile(
             detail="Profile not found. Complete onboarding first."
         )
 
+    old_fingerprint = profile_fingerprint(profile)
+
     # Update personal info
     profile.first_name = data.first_name
     profile.last_name = data.last_name
@@ -114,8 +129,15 @@ def update_profile(
     profile.target_country = data.target_country
     profile.budget_range = data.budget_range
 
+    # Drop cached recommendations if any field feeding the AI prompt changed, and regenerate them
+    new_fingerprint = profile_fingerprint(profile)
+    if new_fingerprint != old_fingerprint:
+        invalidate_cached_recommendations(db, user.id)
+        enqueue_recommendation_job(db, user.id, new_fingerprint)
+
     db.add(profile)
     db.commit()
+    counsellor_context_cache.invalidate(user.id)
     db.refresh(profile)
 
     return {
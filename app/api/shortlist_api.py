@@ -1,16 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
 
 from app.db.session import get_db
+from app.db.replica import get_async_read_db
 from app.models.shortlist import Shortlist
 from app.models.locked_university import LockedUniversity
 from app.models.university import University
 from app.models.user import User
 from app.models.application_checklist import ApplicationChecklist
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_current_user_async
 from app.core.stages import STAGE
+from app.core.identity_cache import identity_cache
+from app.services.counsellor_context import counsellor_context_cache
 from app.core.jwt import create_access_token
+from app.services.shortlist_service import (
+    get_user_shortlist_async,
+    locked_university_summary,
+    university_summary,
+)
 
 router = APIRouter(prefix="/shortlist", tags=["Shortlist"])
 
@@ -63,7 +73,13 @@ def add_to_shortlist(
     )
 
     db.add(shortlist)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request shortlisted the same university first
+        db.rollback()
+        raise HTTPException(status_code=400, detail="University already shortlisted")
+    counsellor_context_cache.invalidate(user.id)
 
     # Auto stage transition (first shortlist triggers SHORTLISTING stage)
     new_count = (
@@ -76,6 +92,7 @@ def add_to_shortlist(
     if new_count == 1 and user.stage == STAGE.DISCOVERY:
         user.stage = STAGE.SHORTLISTING
         db.commit()
+        identity_cache.invalidate(user.id)
         stage_changed = True
 
     response = {
@@ -94,31 +111,20 @@ def add_to_shortlist(
 
 
 @router.get("/")
-def get_shortlist(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+async def get_shortlist(
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
 ):
-    items = (
-        db.query(Shortlist)
-        .filter(Shortlist.user_id == user.id)
-        .all()
-    )
+    # Fetch shortlist items with full university details in one query
+    items = await get_user_shortlist_async(db, user.id)
 
-    # Fetch full university details
-    shortlisted_universities = []
-    for item in items:
-        uni = db.query(University).filter(University.id == item.university_id).first()
-        if uni:
-            shortlisted_universities.append({
-                "id": str(uni.id),
-                "name": uni.name,
-                "country": uni.country,
-                "degree": uni.degree,
-                "field": uni.field,
-                "estimated_tuition": (uni.tuition_min + uni.tuition_max) // 2,
-                "difficulty": uni.difficulty,
-                "shortlisted_at": item.created_at.isoformat() if getattr(item, "created_at", None) else None
-            })
+    shortlisted_universities = [
+        {
+            **university_summary(item.university),
+            "shortlisted_at": item.created_at.isoformat() if item.created_at else None
+        }
+        for item in items
+    ]
 
     return {
         "count": len(shortlisted_universities),
@@ -159,6 +165,7 @@ def remove_from_shortlist(
 
     db.delete(item)
     db.commit()
+    counsellor_context_cache.invalidate(user.id)
 
     return {"message": "Removed from shortlist"}
 
@@ -231,6 +238,8 @@ def lock_university(
     # Transition stage to LOCKED
     user.stage = STAGE.LOCKED
     db.commit()
+    identity_cache.invalidate(user.id)
+    counsellor_context_cache.invalidate(user.id)
 
     return {
         "message": "University locked successfully! You can now proceed to the application stage.",
@@ -241,7 +250,10 @@ def lock_university(
             "degree": uni.degree,
             "field": uni.field
         },
-        "stage": user.stage
+        "stage": user.stage,
+        # The stage changed, so the old token's stage claim is stale
+        "access_token": create_access_token(user.id, user.email, user.stage),
+        "token_type": "bearer"
     }
 
 
@@ -273,10 +285,15 @@ def unlock_university(
     # Revert stage to SHORTLISTING
     user.stage = STAGE.SHORTLISTING
     db.commit()
+    identity_cache.invalidate(user.id)
+    counsellor_context_cache.invalidate(user.id)
 
     return {
         "message": "University unlocked successfully. You can now modify your shortlist or lock a different university.",
-        "stage": user.stage
+        "stage": user.stage,
+        # The stage changed, so the old token's stage claim is stale
+        "access_token": create_access_token(user.id, user.email, user.stage),
+        "token_type": "bearer"
     }
 
 
@@ -296,20 +313,13 @@ def get_locked_university(
     if not locked:
         return {"locked_university": None, "stage": user.stage}
 
-    uni = db.query(University).filter(University.id == locked.university_id).first()
-
-    if not uni:
+    # Served from the snapshot stored at lock time
+    if not locked.university_data:
         return {"locked_university": None, "stage": user.stage}
 
     return {
         "locked_university": {
-            "id": str(uni.id),
-            "name": uni.name,
-            "country": uni.country,
-            "degree": uni.degree,
-            "field": uni.field,
-            "estimated_tuition": (uni.tuition_min + uni.tuition_max) // 2,
-            "difficulty": uni.difficulty,
+            **locked_university_summary(locked.university_data),
             "locked_at": locked.locked_at.isoformat() if locked.locked_at else None
         },
         "stage": user.stage
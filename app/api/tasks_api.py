@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
 from pydantic import BaseModel
 from typing import List
 
 from app.db.session import get_db
+from app.db.replica import get_async_read_db
 from app.models.task import Task
 from app.models.user import User
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_current_user_async
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
@@ -35,12 +38,12 @@ class TaskResponse(BaseModel):
 
 # Routes
 @router.get("/", response_model=List[TaskResponse])
-def get_tasks(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+async def get_tasks(
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_async),
 ):
     """Get all tasks for the current user."""
-    tasks = db.query(Task).filter(Task.user_id == user.id).all()
+    tasks = (await db.scalars(select(Task).where(Task.user_id == user.id))).all()
     return [
         TaskResponse(
             id=str(task.id),
@@ -5,6 +5,83 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Fast start: skip create_all and startup warm-ups (schema is managed by init_db)
+FAST_START = os.getenv("FAST_START", "false").lower() == "true"
+
+# Database connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Optional read replica for read-only endpoints
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+# After a user's write, serve their reads from the primary for this long
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+# After a failed replica connection, use the primary for this long
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+# Per-request SQL instrumentation (Server-Timing header, /internal/metrics)
+SQL_INSTRUMENTATION_ENABLED = os.getenv("SQL_INSTRUMENTATION_ENABLED", "true").lower() == "true"
+# Flag requests that run the same statement more than this many times; 0 disables
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "0"))
+# Raise instead of logging when the threshold is exceeded (for tests)
+SQL_N_PLUS_ONE_STRICT = os.getenv("SQL_N_PLUS_ONE_STRICT", "false").lower() == "true"
+
 SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-jwt-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+
+# Shared secret for /internal/* (sent as X-Internal-Token); the endpoints are not mounted when unset
+INTERNAL_METRICS_TOKEN = os.getenv("INTERNAL_METRICS_TOKEN") or None
+
+# Authenticated user cache (per process); 0 disables it
+IDENTITY_CACHE_TTL_SECONDS = float(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "30"))
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+# Check stage requirements against the signed `stage` claim instead of the users row
+AUTH_TRUST_JWT_STAGE = os.getenv("AUTH_TRUST_JWT_STAGE", "false").lower() == "true"
+
+# University discovery cache
+RECOMMENDATION_CACHE_TTL_HOURS = int(os.getenv("RECOMMENDATION_CACHE_TTL_HOURS", "24"))
+SHARED_RECOMMENDATION_CACHE_SIZE = int(os.getenv("SHARED_RECOMMENDATION_CACHE_SIZE", "512"))
+
+# In-memory university catalog used as the LLM-free discovery path
+CATALOG_REFRESH_SECONDS = int(os.getenv("CATALOG_REFRESH_SECONDS", "60"))
+GEMINI_LATENCY_BUDGET_SECONDS = float(os.getenv("GEMINI_LATENCY_BUDGET_SECONDS", "20"))
+
+# Rendered counsellor context (profile, lock, shortlist) per user; 0 disables the cache
+COUNSELLOR_CONTEXT_TTL_SECONDS = float(os.getenv("COUNSELLOR_CONTEXT_TTL_SECONDS", "600"))
+COUNSELLOR_CONTEXT_CACHE_SIZE = int(os.getenv("COUNSELLOR_CONTEXT_CACHE_SIZE", "10000"))
+
+# Shared outbound HTTP clients (OpenRouter)
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "30"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+# Retries on 429/5xx and connection failures, with jittered exponential backoff
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE_SECONDS = float(os.getenv("HTTP_BACKOFF_BASE_SECONDS", "0.5"))
+HTTP_BACKOFF_MAX_SECONDS = float(os.getenv("HTTP_BACKOFF_MAX_SECONDS", "8"))
+
+# AI rate limits per user, as "<requests>/<seconds>" sliding windows
+AI_CHAT_RATE_LIMIT = os.getenv("AI_CHAT_RATE_LIMIT", "3/120")
+AI_DISCOVER_RATE_LIMIT = os.getenv("AI_DISCOVER_RATE_LIMIT", "10/60")
+AI_REFRESH_RATE_LIMIT = os.getenv("AI_REFRESH_RATE_LIMIT", "3/300")
+AI_SOP_RATE_LIMIT = os.getenv("AI_SOP_RATE_LIMIT", "5/600")
+# "memory" (per process) or "redis" (shared by all workers; needs REDIS_URL)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+REDIS_URL = os.getenv("REDIS_URL") or None
+# Where read-your-writes stickiness is recorded: "redis" (seen by all workers) or "memory" (single worker only)
+REPLICA_STICKY_BACKEND = (os.getenv("REPLICA_STICKY_BACKEND") or ("redis" if REDIS_URL else "memory")).lower()
+
+# Counsellor prompt size: recent turns within this many tokens, older turns go into a rolling summary
+COUNSELLOR_HISTORY_TOKEN_BUDGET = int(os.getenv("COUNSELLOR_HISTORY_TOKEN_BUDGET", "1500"))
+COUNSELLOR_SUMMARY_MAX_TOKENS = int(os.getenv("COUNSELLOR_SUMMARY_MAX_TOKENS", "300"))
+
+# Background recommendation precomputation
+RECOMMENDATION_WORKER_ENABLED = os.getenv("RECOMMENDATION_WORKER_ENABLED", "true").lower() == "true"
+RECOMMENDATION_JOB_POLL_SECONDS = float(os.getenv("RECOMMENDATION_JOB_POLL_SECONDS", "2"))
+RECOMMENDATION_JOB_MAX_ATTEMPTS = int(os.getenv("RECOMMENDATION_JOB_MAX_ATTEMPTS", "3"))
+RECOMMENDATION_JOB_STALE_SECONDS = int(os.getenv("RECOMMENDATION_JOB_STALE_SECONDS", "300"))
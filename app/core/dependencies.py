@@ -1,41 +1,123 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.config import SECRET_KEY, ALGORITHM
+from app.core.config import SECRET_KEY, ALGORITHM, AUTH_TRUST_JWT_STAGE, INTERNAL_METRICS_TOKEN
+from app.core.identity_cache import identity_cache
+from app.core.rate_limit import rate_limiter
 from app.db.session import get_db
+from app.db.async_session import get_async_db
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str | None = payload.get("sub")
-
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload",
-            )
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+        )
 
-        user = db.query(User).filter(User.id == user_id).first()
+    if payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload",
+        )
 
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found",
-            )
+    return payload
 
-        return user
 
-    except JWTError:
+def _require_user(user: User | None) -> User:
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
+            detail="User not found",
         )
+
+    return user
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    user_id = _decode_token(token)["sub"]
+
+    # Attach the cached row to this session without a SELECT
+    cached = identity_cache.get(user_id)
+    if cached is not None:
+        return db.merge(cached, load=False)
+
+    user = _require_user(db.query(User).filter(User.id == user_id).first())
+    identity_cache.put(user)
+    return user
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    """Async variant of get_current_user for async endpoints."""
+    user_id = _decode_token(token)["sub"]
+
+    cached = identity_cache.get(user_id)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    user = _require_user(await db.scalar(select(User).where(User.id == user_id)))
+    identity_cache.put(user)
+    return user
+
+
+def require_stage(*stages, detail: str = "Not allowed at your current stage"):
+    """
+    Dependency that rejects users outside the given stages with a 403.
+
+    With AUTH_TRUST_JWT_STAGE enabled the signed `stage` claim is checked and
+    the users table is not touched. Every endpoint that changes the stage
+    (onboarding, shortlist add, lock/unlock, completing the first application
+    task) returns a new `access_token`, which the frontend swaps in; a client
+    that keeps using an older token is judged by its old stage until it expires.
+    """
+    allowed = {str(getattr(stage, "value", stage)) for stage in stages}
+
+    def check_stage(
+        token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db),
+    ) -> None:
+        stage = None
+        if AUTH_TRUST_JWT_STAGE:
+            stage = _decode_token(token).get("stage")
+        if stage is None:
+            stage = get_current_user(token, db).stage
+
+        if str(getattr(stage, "value", stage)) not in allowed:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+    return check_stage
+
+
+def rate_limit(policy_name: str):
+    """
+    Dependency that counts the request against the user's quota for a rate
+    limit policy (see app.core.rate_limit) and rejects it with a 429 when the
+    quota is used up. Only the token is decoded; the users table is not touched.
+    """
+    def check_rate_limit(token: str = Depends(oauth2_scheme)) -> None:
+        rate_limiter.check(policy_name, _decode_token(token)["sub"])
+
+    return check_rate_limit
+
+
+def require_internal_token(x_internal_token: str = Header(default="")) -> None:
+    """Dependency for /internal/* endpoints: the X-Internal-Token header must match INTERNAL_METRICS_TOKEN."""
+    if not INTERNAL_METRICS_TOKEN or not hmac.compare_digest(x_internal_token, INTERNAL_METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
@@ -5,17 +5,28 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-EMAIL_HOST = os.getenv("EMAIL_HOST")
-EMAIL_PORT = int(os.getenv("EMAIL_PORT"))
-EMAIL_USER = os.getenv("EMAIL_USER")
-EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
-EMAIL_FROM = os.getenv("EMAIL_FROM")
+
+def _email_settings() -> dict:
+    """Read SMTP settings when an email is sent, so a missing value doesn't break app import."""
+    host = os.getenv("EMAIL_HOST")
+    if not host:
+        raise RuntimeError("EMAIL_HOST is not set in .env")
+
+    return {
+        "host": host,
+        "port": int(os.getenv("EMAIL_PORT") or 587),
+        "user": os.getenv("EMAIL_USER"),
+        "password": os.getenv("EMAIL_PASSWORD"),
+        "from": os.getenv("EMAIL_FROM"),
+    }
 
 
 def send_otp_email(to_email: str, otp: str):
+    settings = _email_settings()
+
     msg = EmailMessage()
     msg["Subject"] = "Your AI Counsellor OTP Verification"
-    msg["From"] = EMAIL_FROM
+    msg["From"] = settings["from"]
     msg["To"] = to_email
 
     msg.set_content(
@@ -34,7 +45,7 @@ If you didn’t request this, you can ignore this email.
 """
     )
 
-    with smtplib.SMTP(EMAIL_HOST, EMAIL_PORT) as server:
+    with smtplib.SMTP(settings["host"], settings["port"]) as server:
         server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
+        server.login(settings["user"], settings["password"])
         server.send_message(msg)
@@ -0,0 +1,53 @@
+"""
+Short-lived, bounded cache of authenticated users.
+
+get_current_user runs on every authenticated request. Instead of querying
+`users` each time, it keeps a detached copy of the row per user id for
+IDENTITY_CACHE_TTL_SECONDS and merges it into the request session with
+`merge(load=False)`, which attaches it without a SELECT.
+
+Anything that changes a user's stage or active status must call
+`identity_cache.invalidate(user.id)` after committing. The cache is per
+process, so other workers can serve the old row for up to the TTL.
+"""
+
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL_SECONDS
+from app.core.ttl_cache import TTLCache
+from app.models.user import User
+
+
+def _detached_copy(user: User) -> User:
+    """Copy the user's column values into a clean, detached instance not tied to any session."""
+    values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    copy = User(**values)
+    make_transient_to_detached(copy)
+    return copy
+
+
+class IdentityCache:
+    """LRU of detached User rows keyed by user id, with a TTL."""
+
+    def __init__(self, max_size: int = IDENTITY_CACHE_SIZE, ttl_seconds: float = IDENTITY_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(max_size, ttl_seconds)
+
+    def get(self, user_id) -> Optional[User]:
+        """Return the cached detached row; callers must merge it into their session (load=False)."""
+        return self._cache.get(str(user_id))
+
+    def put(self, user: User) -> None:
+        if self._cache.enabled:
+            self._cache.put(str(user.id), _detached_copy(user))
+
+    def invalidate(self, user_id) -> None:
+        self._cache.pop(str(user_id))
+
+    def stats(self):
+        return self._cache.stats()
+
+
+identity_cache = IdentityCache()
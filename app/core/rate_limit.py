@@ -0,0 +1,223 @@
+"""
+Sliding-window rate limiting for AI endpoints.
+
+Each policy allows `limit` requests per user within any `window_seconds`
+span. Two backends are available (RATE_LIMIT_BACKEND):
+
+- memory: per-process sliding log, bounded to RATE_LIMIT_MAX_KEYS users
+  (least recently seen are evicted). Each worker enforces its own quota.
+- redis:  one sorted set per user and policy, updated atomically by a Lua
+  script using the Redis server clock, so the quota is shared by all
+  workers and survives restarts. If Redis is unreachable, requests fall
+  back to the in-memory backend rather than failing.
+
+Both backends take their dependencies as arguments (a clock, a Redis
+client), so they can be exercised against a local stand-in; see
+scripts/check_rate_limiter.py.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import (
+    AI_CHAT_RATE_LIMIT,
+    AI_DISCOVER_RATE_LIMIT,
+    AI_REFRESH_RATE_LIMIT,
+    AI_SOP_RATE_LIMIT,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_MAX_KEYS,
+    REDIS_URL,
+)
+
+
+class RateLimitPolicy:
+    def __init__(self, name: str, limit: int, window_seconds: float):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    @classmethod
+    def parse(cls, name: str, spec: str) -> "RateLimitPolicy":
+        """Build a policy from a "<requests>/<seconds>" string, e.g. "3/120"."""
+        limit, window = spec.split("/", 1)
+        return cls(name, int(limit), float(window))
+
+    def __repr__(self):
+        return f"RateLimitPolicy({self.name!r}, {self.limit}/{self.window_seconds:g}s)"
+
+
+class RateLimitResult:
+    def __init__(self, allowed: bool, remaining: int, retry_after: float = 0.0):
+        self.allowed = allowed
+        self.remaining = remaining
+        self.retry_after = retry_after
+
+
+# =========================
+# BACKENDS
+# =========================
+
+class InMemoryRateLimitBackend:
+    """Per-process sliding log with LRU eviction of idle keys."""
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._logs: "OrderedDict[str, deque]" = OrderedDict()
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> RateLimitResult:
+        now = self.clock()
+        window_start = now - window_seconds
+        with self._lock:
+            log = self._logs.get(key)
+            if log is None:
+                log = self._logs[key] = deque()
+            self._logs.move_to_end(key)
+
+            while log and log[0] <= window_start:
+                log.popleft()
+
+            if len(log) >= limit:
+                return RateLimitResult(False, 0, log[0] + window_seconds - now)
+
+            log.append(now)
+            while len(self._logs) > self.max_keys:
+                self._logs.popitem(last=False)
+            return RateLimitResult(True, limit - len(log))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"keys": len(self._logs)}
+
+
+# KEYS[1] = sorted set of request timestamps (microseconds)
+# ARGV = limit, window in microseconds, unique member id
+# Returns {allowed, remaining, retry_after_us}
+_SLIDING_WINDOW_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000000 + tonumber(t[2])
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return {0, 0, tonumber(oldest[2]) + window - now}
+end
+
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], math.ceil(window / 1000))
+return {1, limit - count - 1, 0}
+"""
+
+
+class RedisRateLimitBackend:
+    """Sliding log in Redis, shared by every worker."""
+
+    name = "redis"
+
+    def __init__(self, client, fallback: Optional[InMemoryRateLimitBackend] = None, retry_seconds: float = 30):
+        self.client = client
+        self.fallback = fallback or InMemoryRateLimitBackend()
+        self.retry_seconds = retry_seconds
+        self._script = client.register_script(_SLIDING_WINDOW_LUA)
+        self._down_until = 0.0
+        self.errors = 0
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> RateLimitResult:
+        if time.monotonic() < self._down_until:
+            return self.fallback.hit(key, limit, window_seconds)
+        try:
+            allowed, remaining, retry_after_us = self._script(
+                keys=[key],
+                args=[limit, int(window_seconds * 1_000_000), uuid.uuid4().hex],
+            )
+        except Exception as e:
+            self.errors += 1
+            self._down_until = time.monotonic() + self.retry_seconds
+            print(f"⚠️ Redis rate limiter unavailable, using in-memory limits for {self.retry_seconds:g}s: {e}")
+            return self.fallback.hit(key, limit, window_seconds)
+        return RateLimitResult(bool(allowed), int(remaining), int(retry_after_us) / 1_000_000)
+
+    def stats(self) -> Dict:
+        return {
+            "errors": self.errors,
+            "using_fallback": time.monotonic() < self._down_until,
+            "fallback": self.fallback.stats(),
+        }
+
+
+# =========================
+# LIMITER
+# =========================
+
+class RateLimiter:
+    def __init__(self, backend, policies: Dict[str, RateLimitPolicy]):
+        self.backend = backend
+        self.policies = policies
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, policy_name: str, subject) -> RateLimitResult:
+        policy = self.policies[policy_name]
+        result = self.backend.hit(f"ratelimit:{policy.name}:{subject}", policy.limit, policy.window_seconds)
+        with self._lock:
+            if result.allowed:
+                self.allowed += 1
+            else:
+                self.limited += 1
+        return result
+
+    def check(self, policy_name: str, subject) -> RateLimitResult:
+        """Record a request, raising 429 with Retry-After if the policy's quota is used up."""
+        result = self.hit(policy_name, subject)
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many AI requests. Try again later.",
+                headers={"Retry-After": str(max(1, int(result.retry_after + 0.999)))},
+            )
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = {"allowed": self.allowed, "limited": self.limited}
+        return {
+            "backend": self.backend.name,
+            **counts,
+            "policies": {name: repr(policy) for name, policy in self.policies.items()},
+            **self.backend.stats(),
+        }
+
+
+def _build_backend():
+    if RATE_LIMIT_BACKEND == "redis":
+        if not REDIS_URL:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires REDIS_URL")
+        import redis
+
+        return RedisRateLimitBackend(redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5))
+    return InMemoryRateLimitBackend()
+
+
+AI_POLICIES = {
+    policy.name: policy
+    for policy in (
+        RateLimitPolicy.parse("chat", AI_CHAT_RATE_LIMIT),
+        RateLimitPolicy.parse("discover", AI_DISCOVER_RATE_LIMIT),
+        RateLimitPolicy.parse("refresh", AI_REFRESH_RATE_LIMIT),
+        RateLimitPolicy.parse("sop", AI_SOP_RATE_LIMIT),
+    )
+}
+
+rate_limiter = RateLimiter(_build_backend(), AI_POLICIES)
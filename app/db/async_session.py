@@ -0,0 +1,66 @@
+"""
+Async database engine and session dependency.
+
+Used by the high-traffic read endpoints so their queries don't each occupy a
+threadpool thread. Everything else (other routers, init_db, seed scripts,
+the recommendation worker) keeps using the sync engine in app/db/session.py;
+both engines point at the same database.
+"""
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
+from app.db.session import DATABASE_URL
+
+
+def to_async_url(database_url: str):
+    """
+    Convert a sync Postgres URL (postgresql:// or postgresql+psycopg2://) to
+    asyncpg. asyncpg doesn't understand libpq's sslmode query parameter, so it
+    is returned separately as connect args.
+    """
+    url = make_url(database_url)
+    connect_args = {}
+
+    if url.drivername in ("postgres", "postgresql", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+asyncpg")
+
+    query = dict(url.query)
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    url = url.set(query=query)
+
+    return url, connect_args
+
+
+_async_url, _connect_args = to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    _async_url,
+    connect_args=_connect_args,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    # Objects stay readable after commit without an implicit (sync) refresh
+    expire_on_commit=False,
+)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -6,8 +6,12 @@ from app.models.ai_university import AIUniversityResult
 from app.models.locked_university import LockedUniversity
 from app.models.application_checklist import ApplicationChecklist
 from app.models.cached_recommendation import CachedRecommendation
+from app.models.shared_recommendation import SharedRecommendation
+from app.models.recommendation_job import RecommendationJob
 from app.models.application_document import ApplicationDocument, SOPDraft
 from app.models.ai_counsellor_chat import AICounsellorChat
+from app.models.conversation_summary import ConversationSummary
+from app.services.recommendation_cache import catalog_country, catalog_degree
 
 
 def run_migrations():
@@ -32,6 +36,35 @@ def run_migrations():
         print("Successfully added 'generated_by_ai' column!")
     else:
         print("Column 'generated_by_ai' already exists. Skipping migration.")
+
+    # Migration for universities table - normalized name lookup key
+    if 'name_normalized' not in university_columns:
+        print("Adding 'name_normalized' column to universities table...")
+        with engine.connect() as conn:
+            conn.execute(text("ALTER TABLE universities ADD COLUMN name_normalized VARCHAR"))
+            # Same rule as normalize_university_name(): collapse whitespace, lowercase
+            conn.execute(text("""
+                UPDATE universities
+                SET name_normalized = lower(regexp_replace(btrim(name), '\\s+', ' ', 'g'))
+            """))
+            conn.commit()
+        print("Successfully added 'name_normalized' column!")
+
+    if 'created_at' not in university_columns:
+        print("Adding 'created_at' column to universities table...")
+        with engine.connect() as conn:
+            conn.execute(text("""
+                ALTER TABLE universities
+                ADD COLUMN created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_universities_created_at
+                ON universities (created_at)
+            """))
+            conn.commit()
+        print("Successfully added 'created_at' column!")
+
+    _migrate_university_catalog_key(inspector)
     
     # Migration for shortlists table - add is_locked column
     shortlist_columns = [c['name'] for c in inspector.get_columns('shortlists')]
@@ -71,6 +104,239 @@ def run_migrations():
         else:
             print(f"Column '{col}' already exists. Skipping.")
 
+    # Migration for cached_recommendations table - profile fingerprint and ordering
+    cached_columns = [c['name'] for c in inspector.get_columns('cached_recommendations')]
+
+    if 'profile_hash' not in cached_columns:
+        print("Adding 'profile_hash' column to cached_recommendations table...")
+        with engine.connect() as conn:
+            conn.execute(text("ALTER TABLE cached_recommendations ADD COLUMN profile_hash VARCHAR(64)"))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_cached_recommendations_profile_hash
+                ON cached_recommendations (profile_hash)
+            """))
+            conn.commit()
+        print("Successfully added 'profile_hash' column!")
+
+    if 'rank' not in cached_columns:
+        print("Adding 'rank' column to cached_recommendations table...")
+        with engine.connect() as conn:
+            conn.execute(text("ALTER TABLE cached_recommendations ADD COLUMN rank INTEGER NOT NULL DEFAULT 0"))
+            conn.commit()
+        print("Successfully added 'rank' column!")
+
+    # Migration for ai_university_results table - profile fingerprint for precomputed results
+    ai_result_columns = [c['name'] for c in inspector.get_columns('ai_university_results')]
+
+    if 'profile_hash' not in ai_result_columns:
+        print("Adding 'profile_hash' column to ai_university_results table...")
+        with engine.connect() as conn:
+            conn.execute(text("ALTER TABLE ai_university_results ADD COLUMN profile_hash VARCHAR(64)"))
+            conn.commit()
+        print("Successfully added 'profile_hash' column!")
+
+    if 'updated_at' not in ai_result_columns:
+        print("Adding 'updated_at' column to ai_university_results table...")
+        with engine.connect() as conn:
+            conn.execute(text("ALTER TABLE ai_university_results ADD COLUMN updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()"))
+            conn.commit()
+        print("Successfully added 'updated_at' column!")
+
+    _migrate_hot_path_indexes(inspector)
+
+
+def _normalize_university_catalog_values():
+    """
+    Rewrite country/degree to the spellings new rows are saved with
+    (catalog_country / catalog_degree), so rows saved before that ("United
+    States", "Master's") share a catalog key with new upserts. Rows that end
+    up with the same key are merged into one, keeping curated rows over AI
+    ones, and shortlists, locks and cached recommendations are repointed.
+    """
+    with engine.connect() as conn:
+        countries = conn.execute(text("SELECT DISTINCT country FROM universities")).scalars().all()
+        degrees = conn.execute(text("SELECT DISTINCT degree FROM universities")).scalars().all()
+
+    # The mapping is computed with the same functions the app uses, then applied in SQL
+    country_fixes = [{"old": v, "new": catalog_country(v)} for v in countries if v is not None and catalog_country(v) != v]
+    degree_fixes = [{"old": v, "new": catalog_degree(v)} for v in degrees if v is not None and catalog_degree(v) != v]
+    if not country_fixes and not degree_fixes:
+        return
+
+    print(f"Normalizing {len(country_fixes)} country and {len(degree_fixes)} degree spellings in universities...")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TEMP TABLE country_fix (old VARCHAR PRIMARY KEY, new VARCHAR NOT NULL) ON COMMIT DROP"))
+        conn.execute(text("CREATE TEMP TABLE degree_fix (old VARCHAR PRIMARY KEY, new VARCHAR NOT NULL) ON COMMIT DROP"))
+        if country_fixes:
+            conn.execute(text("INSERT INTO country_fix (old, new) VALUES (:old, :new)"), country_fixes)
+        if degree_fixes:
+            conn.execute(text("INSERT INTO degree_fix (old, new) VALUES (:old, :new)"), degree_fixes)
+
+        # Canonical key per row, and the row each key's duplicates merge into
+        conn.execute(text("""
+            CREATE TEMP TABLE university_merge ON COMMIT DROP AS
+            SELECT id, country, degree, keep_id
+            FROM (
+                SELECT u.id,
+                       COALESCE(c.new, u.country) AS country,
+                       COALESCE(d.new, u.degree) AS degree,
+                       CASE WHEN u.name_normalized IS NULL THEN u.id ELSE first_value(u.id) OVER (
+                           PARTITION BY u.name_normalized, COALESCE(c.new, u.country), COALESCE(d.new, u.degree)
+                           ORDER BY u.generated_by_ai, u.created_at, u.id
+                       ) END AS keep_id
+                FROM universities u
+                LEFT JOIN country_fix c ON c.old = u.country
+                LEFT JOIN degree_fix d ON d.old = u.degree
+            ) keyed
+            WHERE id <> keep_id OR id IN (
+                SELECT u.id FROM universities u
+                WHERE u.country IN (SELECT old FROM country_fix) OR u.degree IN (SELECT old FROM degree_fix)
+            )
+        """))
+
+        # A user keeps one shortlist row per merged university, preferring the surviving row's
+        conn.execute(text("""
+            DELETE FROM shortlists WHERE id IN (
+                SELECT id FROM (
+                    SELECT s.id, row_number() OVER (
+                        PARTITION BY s.user_id, COALESCE(m.keep_id, s.university_id)
+                        ORDER BY (m.id IS NULL OR m.id = m.keep_id) DESC, s.created_at, s.id
+                    ) AS rn
+                    FROM shortlists s
+                    LEFT JOIN university_merge m ON m.id = s.university_id
+                    WHERE s.user_id IN (
+                        SELECT s2.user_id FROM shortlists s2
+                        JOIN university_merge m2 ON m2.id = s2.university_id AND m2.id <> m2.keep_id
+                    )
+                ) ranked
+                WHERE rn > 1
+            )
+        """))
+        for table in ("shortlists", "locked_universities", "cached_recommendations"):
+            conn.execute(text(f"""
+                UPDATE {table} t SET university_id = m.keep_id
+                FROM university_merge m
+                WHERE t.university_id = m.id AND m.id <> m.keep_id
+            """))
+
+        merged = conn.execute(text("""
+            DELETE FROM universities u USING university_merge m
+            WHERE u.id = m.id AND m.id <> m.keep_id
+        """)).rowcount
+        conn.execute(text("""
+            UPDATE universities u SET country = m.country, degree = m.degree
+            FROM university_merge m
+            WHERE u.id = m.id AND m.id = m.keep_id
+              AND (u.country IS DISTINCT FROM m.country OR u.degree IS DISTINCT FROM m.degree)
+        """))
+        if merged:
+            # Stored recommendation lists may still carry ids of merged rows; they are rebuilt on demand
+            conn.execute(text("DELETE FROM shared_recommendations"))
+            conn.execute(text("DELETE FROM ai_university_results"))
+    print(f"Successfully normalized universities ({merged} duplicate rows merged)!")
+
+
+def _migrate_university_catalog_key(inspector):
+    """
+    Make (name_normalized, country, degree) the unique catalog key, replacing the
+    older unique index on name_normalized alone so a university can be listed
+    once per country and degree.
+
+    Raises if the key cannot be built: bulk_upsert_ai_universities relies on it
+    as its ON CONFLICT target, so discovery would fail on every request.
+    """
+    _normalize_university_catalog_values()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        university_constraints = [c['name'] for c in inspector.get_unique_constraints('universities')]
+        if 'uq_universities_name_country_degree' not in university_constraints:
+            print("Adding unique (name_normalized, country, degree) constraint to universities table...")
+            try:
+                # An invalid index can be left behind by an interrupted concurrent build
+                conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS uq_universities_name_country_degree"))
+                conn.execute(text("""
+                    CREATE UNIQUE INDEX CONCURRENTLY uq_universities_name_country_degree
+                    ON universities (name_normalized, country, degree)
+                """))
+                conn.execute(text("""
+                    ALTER TABLE universities
+                    ADD CONSTRAINT uq_universities_name_country_degree
+                    UNIQUE USING INDEX uq_universities_name_country_degree
+                """))
+                print("Successfully added universities catalog key constraint!")
+            except Exception as e:
+                raise RuntimeError(
+                    "Could not create the unique (name_normalized, country, degree) catalog key on "
+                    f"universities; merge the duplicate rows and re-run init_db: {e}"
+                ) from e
+
+        name_index = next(
+            (i for i in inspector.get_indexes('universities') if i['name'] == 'ix_universities_name_normalized'),
+            None,
+        )
+        if name_index is not None and name_index['unique']:
+            print("Relaxing unique index on universities.name_normalized...")
+            conn.execute(text("DROP INDEX CONCURRENTLY ix_universities_name_normalized"))
+            name_index = None
+        if name_index is None:
+            conn.execute(text("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_universities_name_normalized
+                ON universities (name_normalized)
+            """))
+
+
+# (index name, table, columns) for per-user hot-path queries
+HOT_PATH_INDEXES = [
+    ("ix_ai_counsellor_chats_user_created", "ai_counsellor_chats", "user_id, created_at"),
+    ("ix_ai_counsellor_chats_user_conversation_created", "ai_counsellor_chats", "user_id, conversation_id, created_at"),
+    ("ix_tasks_user_status", "tasks", "user_id, status"),
+    ("ix_cached_recommendations_user_id", "cached_recommendations", "user_id"),
+    ("ix_cached_recommendations_user_hash_rank", "cached_recommendations", "user_id, profile_hash, rank"),
+]
+
+
+def _migrate_hot_path_indexes(inspector):
+    """
+    Add composite indexes for per-user queries and a unique (user_id, university_id)
+    constraint on shortlists. Indexes are built CONCURRENTLY so existing tables stay
+    writable while they build.
+    """
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name, table, columns in HOT_PATH_INDEXES:
+            conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"))
+
+        shortlist_constraints = [c['name'] for c in inspector.get_unique_constraints('shortlists')]
+        if 'uq_shortlists_user_university' not in shortlist_constraints:
+            print("Adding unique (user_id, university_id) constraint to shortlists table...")
+            # Keep one row per pair, preferring a locked row, then the oldest
+            result = conn.execute(text("""
+                DELETE FROM shortlists
+                WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, row_number() OVER (
+                            PARTITION BY user_id, university_id
+                            ORDER BY is_locked DESC NULLS LAST, created_at ASC, id
+                        ) AS rn
+                        FROM shortlists
+                    ) ranked
+                    WHERE rn > 1
+                )
+            """))
+            if result.rowcount:
+                print(f"Removed {result.rowcount} duplicate shortlist rows")
+            # An invalid index can be left behind by an interrupted concurrent build
+            conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS uq_shortlists_user_university"))
+            conn.execute(text("""
+                CREATE UNIQUE INDEX CONCURRENTLY uq_shortlists_user_university
+                ON shortlists (user_id, university_id)
+            """))
+            conn.execute(text("""
+                ALTER TABLE shortlists
+                ADD CONSTRAINT uq_shortlists_user_university UNIQUE USING INDEX uq_shortlists_user_university
+            """))
+            print("Successfully added shortlist unique constraint!")
+
 
 def init_db():
     Base.metadata.create_all(bind=engine)
@@ -0,0 +1,163 @@
+"""
+Per-request SQL instrumentation.
+
+Engine event hooks count statements and DB time for the current request
+(tracked in a context variable set by `SQLTimingMiddleware`). Every response
+gets a `Server-Timing: db;dur=...;desc="N queries"` header, and per-route
+totals are exposed in /internal/metrics.
+
+N+1 detection: with SQL_N_PLUS_ONE_THRESHOLD > 0, a request that runs the
+same parameterized statement more than that many times is logged and
+counted. With SQL_N_PLUS_ONE_STRICT=true (for tests) the offending statement
+raises `NPlusOneDetected` instead, so the stack trace points at the loop.
+"""
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+
+from app.core.config import SQL_N_PLUS_ONE_STRICT, SQL_N_PLUS_ONE_THRESHOLD
+
+
+class NPlusOneDetected(RuntimeError):
+    """Raised in strict mode when a request repeats one statement too many times."""
+
+
+class RequestSQLStats:
+    def __init__(self):
+        self.statements = 0
+        self.db_ms = 0.0
+        self.by_statement: Counter = Counter()
+        self.n_plus_one: Optional[str] = None
+
+
+_request_stats: ContextVar[Optional[RequestSQLStats]] = ContextVar("request_sql_stats", default=None)
+
+
+def current_sql_stats() -> Optional[RequestSQLStats]:
+    return _request_stats.get()
+
+
+@contextmanager
+def track_sql() -> Iterator[RequestSQLStats]:
+    """Count the statements run inside the block, as the middleware does for a request."""
+    stats = RequestSQLStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is None:
+        return
+
+    starts = conn.info.get("query_start")
+    if starts:
+        stats.db_ms += (time.perf_counter() - starts.pop()) * 1000
+    stats.statements += 1
+
+    if SQL_N_PLUS_ONE_THRESHOLD <= 0:
+        return
+
+    # `statement` is the parameterized SQL, so the same query with different ids counts together
+    stats.by_statement[statement] += 1
+    if stats.by_statement[statement] > SQL_N_PLUS_ONE_THRESHOLD and stats.n_plus_one is None:
+        stats.n_plus_one = statement
+        message = (
+            f"N+1 query: statement ran more than {SQL_N_PLUS_ONE_THRESHOLD} times in one request: "
+            f"{' '.join(statement.split())[:200]}"
+        )
+        if SQL_N_PLUS_ONE_STRICT:
+            raise NPlusOneDetected(message)
+        print(f"⚠️ {message}")
+
+
+def instrument_engine(engine) -> None:
+    """Attach the counting hooks to a sync Engine (use `.sync_engine` for async engines)."""
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RouteSQLMetrics:
+    """Per-route totals, for /internal/metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, float]] = {}
+
+    def record(self, route: str, stats: RequestSQLStats) -> None:
+        with self._lock:
+            entry = self._routes.setdefault(
+                route,
+                {"requests": 0, "statements": 0, "db_ms": 0.0, "max_statements": 0, "n_plus_one": 0},
+            )
+            entry["requests"] += 1
+            entry["statements"] += stats.statements
+            entry["db_ms"] += stats.db_ms
+            entry["max_statements"] = max(entry["max_statements"], stats.statements)
+            entry["n_plus_one"] += int(stats.n_plus_one is not None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                route: {
+                    "requests": int(e["requests"]),
+                    "avg_statements": round(e["statements"] / e["requests"], 2),
+                    "max_statements": int(e["max_statements"]),
+                    "avg_db_ms": round(e["db_ms"] / e["requests"], 2),
+                    "n_plus_one_requests": int(e["n_plus_one"]),
+                }
+                for route, e in sorted(self._routes.items())
+            }
+
+
+route_sql_metrics = RouteSQLMetrics()
+
+
+class SQLTimingMiddleware:
+    """
+    ASGI middleware that collects SQL stats for each HTTP request and adds a
+    Server-Timing header. For streaming responses the header reflects the
+    statements run before the first byte was sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQLStats()
+        token = _request_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = f'db;dur={stats.db_ms:.1f};desc="{stats.statements} queries"'
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", header.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            route_sql_metrics.record(f"{scope['method']} {path}", stats)
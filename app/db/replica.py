@@ -0,0 +1,251 @@
+"""
+Read-replica routing for read-only endpoints.
+
+When DATABASE_REPLICA_URL is set, `get_read_db` / `get_async_read_db` hand
+out sessions on the replica instead of the primary. They fall back to the
+primary when:
+
+- the user made a write within the last REPLICA_STICKY_SECONDS, so they
+  always see their own changes despite replication lag (writes are recorded
+  by the middleware in app.main), or
+- the replica could not be reached, or no connection could be checked out
+  of its pool within DB_POOL_TIMEOUT; it is then skipped for
+  REPLICA_RETRY_SECONDS before being tried again.
+
+Writes are recorded in Redis (REPLICA_STICKY_BACKEND=redis, the default when
+REDIS_URL is set) as a key that expires after the sticky window, so a read
+sees the user's write whichever worker handled it. If Redis cannot be
+reached, reads for users without a local write record go to the primary
+rather than risk a stale replica. The in-memory backend only sees writes
+made by the same process and is meant for single-worker deployments.
+
+Replica health is per process.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from jose import jwt, JWTError
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import (
+    ALGORITHM,
+    DATABASE_REPLICA_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    REDIS_URL,
+    REPLICA_RETRY_SECONDS,
+    REPLICA_STICKY_BACKEND,
+    REPLICA_STICKY_SECONDS,
+    SECRET_KEY,
+)
+from app.db.async_session import AsyncSessionLocal, to_async_url
+from app.db.pool import InstrumentedQueuePool
+from app.db.session import SessionLocal
+
+_pool_options = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    # Pre-ping is what detects a dead replica on checkout
+    pool_pre_ping=True if DATABASE_REPLICA_URL else DB_POOL_PRE_PING,
+)
+
+replica_engine = None
+ReplicaSessionLocal = None
+async_replica_engine = None
+AsyncReplicaSessionLocal = None
+
+if DATABASE_REPLICA_URL:
+    replica_engine = create_engine(DATABASE_REPLICA_URL, poolclass=InstrumentedQueuePool, **_pool_options)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+    _async_url, _connect_args = to_async_url(DATABASE_REPLICA_URL)
+    async_replica_engine = create_async_engine(_async_url, connect_args=_connect_args, **_pool_options)
+    AsyncReplicaSessionLocal = async_sessionmaker(bind=async_replica_engine, autoflush=False, expire_on_commit=False)
+
+
+class ReplicaRouter:
+    """
+    Tracks recent writes per user and whether the replica is reachable.
+    `redis_client`, when given, holds the write records for all workers.
+    """
+
+    def __init__(self, redis_client=None, redis_retry_seconds: float = 30):
+        self._lock = threading.Lock()
+        self._last_write: Dict[str, float] = {}
+        self._down_until = 0.0
+        self._redis = redis_client
+        self._redis_retry_seconds = redis_retry_seconds
+        self._redis_down_until = 0.0
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.failovers = 0
+        self.sticky_errors = 0
+
+    @property
+    def shared(self) -> bool:
+        """Whether write records live in Redis (calls then do network I/O)."""
+        return self._redis is not None
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"replica:last_write:{user_id}"
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, error: Exception) -> None:
+        with self._lock:
+            self.sticky_errors += 1
+            self._redis_down_until = time.monotonic() + self._redis_retry_seconds
+        print(f"⚠️ Redis unavailable for replica stickiness, reading from primary for {self._redis_retry_seconds:g}s: {error}")
+
+    def mark_write(self, user_id: Optional[str]) -> None:
+        if not user_id:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[user_id] = now
+            # Drop entries past the sticky window so the map stays small
+            if len(self._last_write) > 10000:
+                cutoff = now - REPLICA_STICKY_SECONDS
+                self._last_write = {uid: ts for uid, ts in self._last_write.items() if ts >= cutoff}
+
+        if self._redis_available():
+            try:
+                self._redis.set(self._key(user_id), 1, px=max(1, int(REPLICA_STICKY_SECONDS * 1000)))
+            except Exception as e:
+                self._redis_failed(e)
+
+    def _recent_write(self, user_id: str) -> bool:
+        with self._lock:
+            last_write = self._last_write.get(user_id)
+        if last_write is not None and time.monotonic() - last_write < REPLICA_STICKY_SECONDS:
+            return True
+        if self._redis is None:
+            return False
+        if not self._redis_available():
+            # Another worker may have recorded a write we cannot see
+            return True
+        try:
+            return bool(self._redis.exists(self._key(user_id)))
+        except Exception as e:
+            self._redis_failed(e)
+            return True
+
+    def use_replica(self, user_id: Optional[str]) -> bool:
+        if ReplicaSessionLocal is None:
+            return False
+        with self._lock:
+            if time.monotonic() < self._down_until:
+                return False
+        return not (user_id and self._recent_write(user_id))
+
+    def mark_down(self, error: Exception) -> None:
+        with self._lock:
+            self._down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+            self.failovers += 1
+        print(f"⚠️ Read replica unavailable, using primary for {REPLICA_RETRY_SECONDS}s: {error}")
+
+    def count(self, replica: bool) -> None:
+        with self._lock:
+            if replica:
+                self.replica_reads += 1
+            else:
+                self.primary_reads += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "configured": ReplicaSessionLocal is not None,
+                "replica_down": time.monotonic() < self._down_until,
+                "replica_reads": self.replica_reads,
+                "primary_reads": self.primary_reads,
+                "failovers": self.failovers,
+                "sticky_backend": "redis" if self._redis is not None else "memory",
+                "sticky_errors": self.sticky_errors,
+            }
+
+
+def _build_sticky_store():
+    if ReplicaSessionLocal is None or REPLICA_STICKY_BACKEND != "redis":
+        return None
+    if not REDIS_URL:
+        raise RuntimeError("REPLICA_STICKY_BACKEND=redis requires REDIS_URL")
+    import redis
+
+    return redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+
+replica_router = ReplicaRouter(_build_sticky_store(), REPLICA_RETRY_SECONDS)
+
+
+def user_id_from_request(request: Request) -> Optional[str]:
+    """The `sub` claim of the request's bearer token, or None."""
+    auth = request.headers.get("authorization", "")
+    if not auth.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.decode(auth[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints: the replica when safe, otherwise the primary."""
+    db = None
+    if replica_router.use_replica(user_id_from_request(request)):
+        db = ReplicaSessionLocal()
+        try:
+            # Check out a (pre-pinged) connection now so a dead or exhausted replica fails over here
+            db.connection()
+        except (DBAPIError, PoolTimeoutError) as e:
+            db.close()
+            db = None
+            replica_router.mark_down(e)
+
+    replica_router.count(replica=db is not None)
+    if db is None:
+        db = SessionLocal()
+
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """Async variant of get_read_db."""
+    db = None
+    user_id = user_id_from_request(request)
+    if replica_router.shared:
+        # The write record lookup is a blocking Redis call
+        use_replica = await run_in_threadpool(replica_router.use_replica, user_id)
+    else:
+        use_replica = replica_router.use_replica(user_id)
+    if use_replica:
+        db = AsyncReplicaSessionLocal()
+        try:
+            await db.connection()
+        except (DBAPIError, PoolTimeoutError, OSError) as e:
+            await db.close()
+            db = None
+            replica_router.mark_down(e)
+
+    replica_router.count(replica=db is not None)
+    if db is None:
+        db = AsyncSessionLocal()
+
+    async with db:
+        yield db
@@ -1,14 +1,23 @@
 # app/main.py
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.session import engine
+from app.db.session import engine, SessionLocal
+from app.db.async_session import async_engine
+from app.db.replica import replica_engine, async_replica_engine, replica_router, user_id_from_request
+from app.db.instrumentation import SQLTimingMiddleware, instrument_engine
 from app.db.base import Base
 from app.models.user import User  # ensure model is imported so metadata is registered
 from app.models.otp import OTP    # ensure OTP table is registered
 from app.models.profile import Profile  # ensure Profile table is registered
 from app.api.api_router import api_router
 from app.core.dependencies import get_current_user
+from app.services.catalog_index import catalog_index
+from app.services.recommendation_jobs import recommendation_worker
+from app.services.http_client import http_clients
+from app.services.gemini_service import gemini_models, DEFAULT_MODEL, QUALITY_MODEL
+from app.core.config import FAST_START, RECOMMENDATION_WORKER_ENABLED, SQL_INSTRUMENTATION_ENABLED
 import uvicorn
 
 app = FastAPI(
@@ -21,11 +30,104 @@ app = FastAPI(
 # -------------------------
 
 # Create tables automatically in development if they don't exist.
-# In production, you should manage schema via migrations instead.
-try:
-    Base.metadata.create_all(bind=engine)
-except Exception as e:
-    print(f"Database tables might already exist: {e}")
+# In production, you should manage schema via migrations instead
+# (set FAST_START=true to skip this and the warm-ups below).
+if not FAST_START:
+    try:
+        Base.metadata.create_all(bind=engine)
+    except Exception as e:
+        print(f"Database tables might already exist: {e}")
+
+# -------------------------
+# Startup Warm-up
+# -------------------------
+
+@app.on_event("startup")
+def warm_catalog_index():
+    """Load the in-memory university catalog so the first discover request doesn't pay for it."""
+    if FAST_START:
+        return
+    db = SessionLocal()
+    try:
+        catalog_index.refresh(db)
+    except Exception as e:
+        print(f"Catalog index warm-up failed: {e}")
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def warm_gemini_models():
+    """Build the Gemini model clients up front so the first AI request doesn't pay for it."""
+    if FAST_START:
+        return
+    try:
+        gemini_models.warm([DEFAULT_MODEL, QUALITY_MODEL])
+    except Exception as e:
+        print(f"Gemini model warm-up failed: {e}")
+
+
+@app.on_event("startup")
+async def open_http_clients():
+    """Open the shared pooled HTTP clients used for OpenRouter calls."""
+    await http_clients.start()
+
+
+@app.on_event("startup")
+def start_recommendation_worker():
+    """Run the recommendation precompute worker in-process unless it is deployed separately."""
+    if RECOMMENDATION_WORKER_ENABLED:
+        recommendation_worker.start()
+
+
+@app.on_event("shutdown")
+def stop_recommendation_worker():
+    recommendation_worker.stop()
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await http_clients.aclose()
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
+    if replica_engine is not None:
+        replica_engine.dispose()
+
+# -------------------------
+# Read Replica Stickiness
+# -------------------------
+
+if replica_engine is not None:
+    @app.middleware("http")
+    async def track_writes_for_replica_reads(request: Request, call_next):
+        """Send a user's reads to the primary while and shortly after they write."""
+        is_write = request.method not in ("GET", "HEAD", "OPTIONS")
+        user_id = user_id_from_request(request) if is_write else None
+        if user_id:
+            # Off the event loop: with the Redis sticky backend this is a network call
+            await run_in_threadpool(replica_router.mark_write, user_id)
+
+        response = await call_next(request)
+
+        if user_id:
+            # Restart the window from when the write finished
+            await run_in_threadpool(replica_router.mark_write, user_id)
+        return response
+
+# -------------------------
+# SQL Instrumentation
+# -------------------------
+
+if SQL_INSTRUMENTATION_ENABLED:
+    for _engine in (engine, async_engine, replica_engine, async_replica_engine):
+        if _engine is not None:
+            instrument_engine(getattr(_engine, "sync_engine", _engine))
+    app.add_middleware(SQLTimingMiddleware)
 
 # -------------------------
 # CORS (Frontend Access)
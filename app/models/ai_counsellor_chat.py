@@ -1,11 +1,17 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.db.base import Base
 
 class AICounsellorChat(Base):
     __tablename__ = "ai_counsellor_chats"
+    __table_args__ = (
+        # Latest conversation for a user
+        Index("ix_ai_counsellor_chats_user_created", "user_id", "created_at"),
+        # Messages of one conversation in order
+        Index("ix_ai_counsellor_chats_user_conversation_created", "user_id", "conversation_id", "created_at"),
+    )
 
     id = Column(
         UUID(as_uuid=True),
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -8,6 +8,8 @@ from app.db.base import Base
 
 class CachedRecommendation(Base):
     __tablename__ = "cached_recommendations"
+    # Per-user cache lookup: WHERE user_id AND profile_hash ORDER BY rank
+    __table_args__ = (Index("ix_cached_recommendations_user_hash_rank", "user_id", "profile_hash", "rank"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -19,6 +21,10 @@ class CachedRecommendation(Base):
     field = Column(String, nullable=False)
     estimated_tuition = Column(Integer, nullable=False)
     difficulty = Column(String, nullable=False)
+
+    # Hash of the profile fields that produced this recommendation, and its position in the list
+    profile_hash = Column(String(64), nullable=True, index=True)
+    rank = Column(Integer, nullable=False, default=0)
     
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
@@ -0,0 +1,23 @@
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class ConversationSummary(Base):
+    """Rolling summary of the older turns of one counsellor conversation."""
+    __tablename__ = "conversation_summaries"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    conversation_id = Column(UUID(as_uuid=True), nullable=False, unique=True, index=True)
+
+    summary = Column(Text, nullable=False)
+
+    # (created_at, id) of the newest message folded into the summary
+    summarized_until = Column(DateTime(timezone=True), nullable=False)
+    summarized_until_id = Column(UUID(as_uuid=True), nullable=False)
+    summarized_messages = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,37 @@
+import uuid
+import enum
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class RecommendationJobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class RecommendationJob(Base):
+    """Queued background generation of a user's university recommendations."""
+    __tablename__ = "recommendation_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Profile fingerprint the job was enqueued for
+    profile_hash = Column(String(64), nullable=False)
+
+    status = Column(
+        SQLEnum(RecommendationJobStatus),
+        default=RecommendationJobStatus.PENDING,
+        nullable=False,
+        index=True,
+    )
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,26 @@
+import uuid
+from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.db.base import Base
+
+
+class SharedRecommendation(Base):
+    """AI recommendations shared by every user with the same normalized discovery inputs."""
+    __tablename__ = "shared_recommendations"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # sha256 of the normalized (degree, field, country, budget bucket, major) tuple
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)
+
+    degree = Column(String, nullable=False)
+    field = Column(String, nullable=False)
+    country = Column(String, nullable=False)
+    budget_bucket = Column(String, nullable=False)
+    major = Column(String, nullable=False)
+
+    # University list with database IDs, without per-user shortlist markers
+    universities = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
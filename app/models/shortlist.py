@@ -1,6 +1,7 @@
 import uuid
-from sqlalchemy import Column, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, ForeignKey, DateTime, Boolean, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -8,9 +9,16 @@ from app.db.base import Base
 
 class Shortlist(Base):
     __tablename__ = "shortlists"
+    # A university can be shortlisted once per user; also serves per-user lookups
+    __table_args__ = (
+        UniqueConstraint("user_id", "university_id", name="uq_shortlists_user_university"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     university_id = Column(UUID(as_uuid=True), ForeignKey("universities.id"), nullable=False)
     is_locked = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Use shortlist_service to load a user's shortlist with its universities in one JOIN
+    university = relationship("University")
@@ -1,11 +1,13 @@
 import uuid
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.db.base import Base
 
 class Task(Base):
     __tablename__ = "tasks"
+    # Per-user task lists and the dashboard pending-task count
+    __table_args__ = (Index("ix_tasks_user_status", "user_id", "status"),)
 
     id = Column(
         UUID(as_uuid=True),
@@ -1,15 +1,27 @@
 import uuid
-from sqlalchemy import Column, String, Integer, Boolean
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
 from app.db.base import Base
 
 
+def normalize_university_name(name: str) -> str:
+    """Case- and whitespace-insensitive key used to match university names."""
+    return " ".join(str(name or "").split()).lower()
+
+
+def _default_name_normalized(context) -> str:
+    return normalize_university_name(context.get_current_parameters().get("name"))
+
+
 class University(Base):
     __tablename__ = "universities"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     name = Column(String, nullable=False)
+    # Indexed lookup key for name matching; filled from `name` on insert
+    name_normalized = Column(String, nullable=True, index=True, default=_default_name_normalized)
     country = Column(String, nullable=False)
     degree = Column(String, nullable=False)  # Masters / Bachelors
     field = Column(String, nullable=False)
@@ -20,3 +32,11 @@ class University(Base):
     difficulty = Column(String, nullable=False)  # LOW / MEDIUM / HIGH
     # Mark universities generated by the AI discovery flow so we can safely refresh them
     generated_by_ai = Column(Boolean, nullable=False, default=False, server_default='false', index=True)
+
+    # Insert time, used by the in-memory catalog index to pick up new rows incrementally
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    # One row per program, so a university can be listed once per country and degree
+    __table_args__ = (
+        UniqueConstraint('name_normalized', 'country', 'degree', name='uq_universities_name_country_degree'),
+    )
@@ -1,8 +1,11 @@
 import os
 import json
-import requests
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
+
+from app.services.http_client import arequest_with_retries, astream_with_retries, make_timeout, request_with_retries
+from app.services.json_stream import extract_json_array
+from app.services.single_flight import llm_single_flight
 
 load_dotenv()
 
@@ -10,36 +13,31 @@ load_dotenv()
 # 🔑 OpenRouter API Config
 # ======================================================
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-if not OPENROUTER_API_KEY:
-    raise RuntimeError("OPENROUTER_API_KEY is not set in .env")
 
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
-HEADERS = {
-    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-    "Content-Type": "application/json",
-    "HTTP-Referer": "https://ai-counsellor.app",
-    "X-Title": "AI Counsellor App",
-}
+def openrouter_headers() -> Dict[str, str]:
+    """Request headers for OpenRouter. The key is checked on first use, not at import."""
+    if not OPENROUTER_API_KEY:
+        raise RuntimeError("OPENROUTER_API_KEY is not set in .env")
 
+    return {
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://ai-counsellor.app",
+        "X-Title": "AI Counsellor App",
+    }
 
-# ======================================================
-# 🧠 Lenient JSON extractor
-# ======================================================
-def extract_json_array(text: str) -> List[Dict]:
-    """
-    Safely extracts a JSON array from AI output.
-    Never throws.
-    """
-    try:
-        start = text.find("[")
-        end = text.rfind("]")
-        if start != -1 and end != -1 and end > start:
-            return json.loads(text[start:end + 1])
-    except Exception:
-        pass
 
-    return []
+
+class AIProviderError(Exception):
+    """Raised when OpenRouter responds with a non-200 status or an unusable body."""
+
+
+def _first_choice(data: Dict) -> Dict:
+    """The first entry of "choices", or {} when it is missing, null or empty."""
+    choices = data.get("choices") or [{}]
+    return choices[0] or {}
 
 
 # ======================================================
@@ -98,56 +96,179 @@ def ask_ai(
     if include_reasoning:
         payload["reasoning"] = {"enabled": True}
 
-    try:
-        response = requests.post(
-            OPENROUTER_URL,
-            headers=HEADERS,
-            json=payload,
-            timeout=30,
-        )
+    def _ask() -> List[Dict]:
+        try:
+            response = request_with_retries(
+                "POST",
+                OPENROUTER_URL,
+                headers=openrouter_headers(),
+                json=payload,
+            )
 
-        print("🔵 OpenRouter status:", response.status_code)
+            print("🔵 OpenRouter status:", response.status_code)
 
-        if response.status_code != 200:
-            print("❌ OpenRouter error:", response.text)
-            return []
+            if response.status_code != 200:
+                print("❌ OpenRouter error:", response.text)
+                return []
 
-        data = response.json()
+            data = response.json()
 
-        # Extract reasoning details if present
-        if include_reasoning:
-            reasoning_details = (
-                data.get("choices", [{}])[0]
+            # Extract reasoning details if present
+            if include_reasoning:
+                reasoning_details = (
+                    _first_choice(data)
+                    .get("message", {})
+                    .get("reasoning_details", {})
+                )
+                print("🔵 Reasoning details:", reasoning_details)
+
+            text = (
+                _first_choice(data)
                 .get("message", {})
-                .get("reasoning_details", {})
+                .get("content", "")
             )
-            print("🔵 Reasoning details:", reasoning_details)
 
-        text = (
-            data.get("choices", [{}])[0]
-            .get("message", {})
-            .get("content", "")
-        )
+            print("🔵 AI raw text:\n", text)
+
+            universities = extract_json_array(text)
+
+            # Final strict cleanup
+            clean = []
+            for uni in universities:
+                if (
+                    isinstance(uni, dict)
+                    and "name" in uni
+                    and "country" in uni
+                ):
+                    clean.append(uni)
+
+            return clean[:10]
+
+        except Exception as e:
+            print("❌ OpenRouter exception:", e)
+            return []
+
+    # Identical concurrent prompts share one upstream call
+    generation_config = {
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "include_reasoning": include_reasoning,
+    }
+    key = llm_single_flight.make_key(model, messages, generation_config)
+    return llm_single_flight.do(key, _ask)
+
+
+# ======================================================
+# ⚡ Async Chat Completion via OpenRouter
+# ======================================================
+async def chat_completion_async(
+    messages: List[Dict],
+    model: str = "openai/gpt-oss-20b:free",
+    max_tokens: int = 500,
+    temperature: float = 0.7,
+    timeout: Optional[float] = None,
+) -> str:
+    """
+    Send a chat conversation to OpenRouter without blocking the event loop.
+    
+    Args:
+        messages: OpenAI-style list of {"role", "content"} messages
+        model: OpenRouter model to use
+        max_tokens: Maximum tokens in response
+        temperature: Temperature for response generation
+        timeout: Read timeout in seconds (default HTTP_READ_TIMEOUT_SECONDS; connecting
+            has its own HTTP_CONNECT_TIMEOUT_SECONDS)
+    
+    Returns:
+        The assistant message content
+    
+    Raises:
+        AIProviderError: If OpenRouter responds with a non-200 status or no choices
+    """
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+
+    response = await arequest_with_retries(
+        "POST", OPENROUTER_URL, headers=openrouter_headers(), json=payload, timeout=make_timeout(timeout)
+    )
 
-        print("🔵 AI raw text:\n", text)
+    if response.status_code != 200:
+        print("❌ OpenRouter error:", response.text)
+        raise AIProviderError(f"OpenRouter returned {response.status_code}")
 
-        universities = extract_json_array(text)
+    data = response.json()
+    if not data.get("choices"):
+        print("❌ OpenRouter returned no choices:", data)
+        raise AIProviderError("OpenRouter returned no choices")
+    return (
+        _first_choice(data)
+        .get("message", {})
+        .get("content", "")
+    )
 
-        # Final strict cleanup
-        clean = []
-        for uni in universities:
-            if (
-                isinstance(uni, dict)
-                and "name" in uni
-                and "country" in uni
-            ):
-                clean.append(uni)
 
-        return clean[:10]
+async def chat_completion_stream(
+    messages: List[Dict],
+    model: str = "openai/gpt-oss-20b:free",
+    max_tokens: int = 500,
+    temperature: float = 0.7,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion from OpenRouter, yielding content deltas as they arrive.
+    
+    The upstream connection is closed when the generator is closed, so callers
+    should consume it with contextlib.aclosing to release it on early exit.
+    
+    Raises:
+        AIProviderError: If OpenRouter responds with a non-200 status
+    """
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True,
+    }
 
-    except Exception as e:
-        print("❌ OpenRouter exception:", e)
-        return []
+    async with astream_with_retries(
+        "POST", OPENROUTER_URL, headers=openrouter_headers(), json=payload, timeout=make_timeout(timeout)
+    ) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            print("❌ OpenRouter stream error:", body.decode("utf-8", errors="replace"))
+            raise AIProviderError(f"OpenRouter returned {response.status_code}")
+
+        async for line in response.aiter_lines():
+            # Skip keep-alive comments (": OPENROUTER PROCESSING") and blank separators
+            if not line.startswith("data:"):
+                continue
+
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            try:
+                chunk = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+
+            # Errors after the stream has started arrive as a chunk with an "error" field
+            if chunk.get("error"):
+                raise AIProviderError(f"OpenRouter stream error: {chunk['error']}")
+
+            # Chunks with an empty "choices" (e.g. the final usage chunk) carry no content
+            delta = (
+                _first_choice(chunk)
+                .get("delta", {})
+                .get("content")
+            )
+            if delta:
+                yield delta
 
 
 # ======================================================
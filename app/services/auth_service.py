@@ -5,6 +5,7 @@ from app.models.user import User
 from app.models.otp import OTP
 from app.core.security import hash_password, verify_password
 from app.core.otp import generate_otp, otp_expiry
+from app.core.identity_cache import identity_cache
 
 
 def create_user_with_otp(db, email: str, password: str):
@@ -72,6 +73,7 @@ def verify_otp(db, email: str, code: str):
     user.is_active = True
     db.delete(otp)
     db.commit()
+    identity_cache.invalidate(user.id)
     db.refresh(user)
 
     return user
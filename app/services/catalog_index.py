@@ -0,0 +1,227 @@
+"""
+In-memory university catalog index.
+
+A column-oriented snapshot of the `universities` table (country, degree,
+field, tuition, difficulty) with posting lists on country and degree, so
+discovery can filter and rank catalog matches in milliseconds without an LLM
+call. It backs `/universities/discover?fast=true` and is the fallback when
+Gemini fails or exceeds its latency budget.
+
+The snapshot is loaded once, then refreshed incrementally: rows inserted by
+this process are added immediately, and rows inserted elsewhere are picked up
+by `created_at` every CATALOG_REFRESH_SECONDS.
+"""
+
+import heapq
+import re
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import CATALOG_REFRESH_SECONDS
+from app.models.university import University
+from app.services.recommendation_cache import normalize_country, normalize_degree, parse_budget_max
+
+# Rows can commit after rows with a later created_at; re-scan this far back on each refresh
+_REFRESH_OVERLAP = timedelta(minutes=5)
+
+_CATALOG_COLUMNS = (
+    University.id,
+    University.name,
+    University.country,
+    University.degree,
+    University.field,
+    University.tuition_min,
+    University.tuition_max,
+    University.difficulty,
+    University.created_at,
+)
+
+
+def _tokens(value) -> Set[str]:
+    return set(re.findall(r"[a-z0-9]+", str(value or "").lower()))
+
+
+class CatalogIndex:
+    """Columnar snapshot of the university catalog with filter + rank search."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.countries: List[str] = []
+        self.degrees: List[str] = []
+        self.fields: List[str] = []
+        self.field_tokens: List[frozenset] = []
+        self.difficulties: List[str] = []
+        self.tuition_min = array("l")
+        self.tuition_max = array("l")
+        self.by_country: Dict[str, List[int]] = {}
+        self.by_degree: Dict[str, List[int]] = {}
+        self._known_ids: Set[str] = set()
+        self.watermark: Optional[datetime] = None
+        self.refreshed_at = 0.0
+        self.loaded = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------
+    def _append(self, row: Dict) -> None:
+        uni_id = str(row["id"])
+        if uni_id in self._known_ids:
+            return
+
+        pos = len(self.ids)
+        country = normalize_country(row["country"])
+        degree = normalize_degree(row["degree"])
+
+        self._known_ids.add(uni_id)
+        self.ids.append(uni_id)
+        self.names.append(row["name"])
+        self.countries.append(row["country"])
+        self.degrees.append(row["degree"])
+        self.fields.append(row["field"])
+        self.field_tokens.append(frozenset(_tokens(row["field"])))
+        self.difficulties.append(str(row["difficulty"] or "MEDIUM").upper())
+        self.tuition_min.append(int(row["tuition_min"] or 0))
+        self.tuition_max.append(int(row["tuition_max"] or 0))
+        self.by_country.setdefault(country, []).append(pos)
+        self.by_degree.setdefault(degree, []).append(pos)
+
+        created_at = row.get("created_at")
+        if created_at is not None and (self.watermark is None or created_at > self.watermark):
+            self.watermark = created_at
+
+    def add_rows(self, rows: Iterable[Dict]) -> None:
+        """Add rows to the snapshot. Rows already indexed are ignored."""
+        with self._lock:
+            for row in rows:
+                self._append(row)
+
+    def _refresh_due(self) -> bool:
+        return not self.loaded or time.monotonic() - self.refreshed_at >= CATALOG_REFRESH_SECONDS
+
+    def refresh(self, db: Session, force: bool = False) -> None:
+        """Load the full catalog on first use, then pull rows inserted since the last refresh."""
+        if not force and not self._refresh_due():
+            return
+
+        # One thread refreshes at a time; the others keep serving the current snapshot
+        with self._refresh_lock:
+            if force or self._refresh_due():
+                self._refresh(db, force)
+
+    def _refresh(self, db: Session, force: bool) -> None:
+        query = select(*_CATALOG_COLUMNS)
+        incremental = self.loaded and not force and self.watermark is not None
+        if incremental:
+            query = query.where(University.created_at >= self.watermark - _REFRESH_OVERLAP)
+
+        rows = [dict(row._mapping) for row in db.execute(query)]
+
+        with self._lock:
+            if not incremental:
+                self._reset()
+            for row in rows:
+                self._append(row)
+            self.loaded = True
+            self.refreshed_at = time.monotonic()
+
+        if not incremental:
+            print(f"[Catalog] Loaded {len(self.ids)} universities into the in-memory index")
+
+    # ------------------------------------------------------
+    # Search
+    # ------------------------------------------------------
+    def search(
+        self,
+        degree: Optional[str] = None,
+        field: Optional[str] = None,
+        country: Optional[str] = None,
+        budget_max: Optional[float] = None,
+        major: Optional[str] = None,
+        limit: int = 12,
+    ) -> List[Dict]:
+        """
+        Filter on country and degree (when the catalog has any rows for them),
+        then rank by field overlap and budget fit.
+        """
+        with self._lock:
+            candidates: Optional[Set[int]] = None
+            for value, postings, normalize in (
+                (country, self.by_country, normalize_country),
+                (degree, self.by_degree, normalize_degree),
+            ):
+                matches = postings.get(normalize(value)) if value else None
+                if not matches:
+                    continue
+                narrowed = set(matches) if candidates is None else candidates & set(matches)
+                # Keep the broader set rather than returning nothing
+                if narrowed:
+                    candidates = narrowed
+
+            positions = range(len(self.ids)) if candidates is None else sorted(candidates)
+            terms = _tokens(field) | _tokens(major)
+            tuition_min = self.tuition_min
+            field_tokens = self.field_tokens
+
+            scored = []
+            for pos in positions:
+                score = 3.0 * len(terms & field_tokens[pos])
+                if budget_max:
+                    if tuition_min[pos] <= budget_max:
+                        score += 2.0
+                    else:
+                        # Penalize proportionally to how far over budget the cheapest option is
+                        score -= min(4.0, (tuition_min[pos] - budget_max) / budget_max * 4.0)
+                scored.append((score, pos))
+
+            top = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], tuition_min[item[1]]))
+
+            return [
+                {
+                    "id": self.ids[pos],
+                    "name": self.names[pos],
+                    "country": self.countries[pos],
+                    "degree": self.degrees[pos],
+                    "field": self.fields[pos],
+                    "estimated_tuition": (self.tuition_min[pos] + self.tuition_max[pos]) // 2,
+                    "difficulty": self.difficulties[pos],
+                }
+                for _, pos in top
+            ]
+
+    def stats(self) -> Dict:
+        return {
+            "rows": len(self.ids),
+            "loaded": self.loaded,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+        }
+
+
+catalog_index = CatalogIndex()
+
+
+def search_catalog(db: Session, profile, limit: int = 12) -> List[Dict]:
+    """Refresh the index if due and return catalog matches for a user's profile."""
+    catalog_index.refresh(db)
+    return catalog_index.search(
+        degree=profile.target_degree,
+        field=profile.target_field,
+        country=profile.target_country,
+        budget_max=parse_budget_max(profile.budget_range),
+        major=profile.major,
+        limit=limit,
+    )
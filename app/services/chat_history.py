@@ -0,0 +1,132 @@
+"""
+Keyset-paginated counsellor chat history.
+
+Pages are read newest-first on (created_at, id) using the
+(user_id, conversation_id, created_at) index, so a page costs the same no
+matter how long the conversation is. Only the columns the client needs are
+selected, as plain row tuples rather than AICounsellorChat instances.
+
+A cursor is the opaque (conversation_id, created_at, id) of the oldest
+message on the previous page; pass it back to get the messages before it.
+It only continues the conversation it was issued for.
+"""
+
+import base64
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Select, and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ai_counsellor_chat import AICounsellorChat
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+Cursor = Tuple[uuid.UUID, datetime, uuid.UUID]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(conversation_id: uuid.UUID, created_at: datetime, chat_id: uuid.UUID) -> str:
+    raw = f"{conversation_id}|{created_at.isoformat()}|{chat_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        conversation_id, created_at, chat_id = raw.split("|")
+        return uuid.UUID(conversation_id), datetime.fromisoformat(created_at), uuid.UUID(chat_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor("Invalid history cursor") from e
+
+
+def latest_conversation_query(user_id) -> Select:
+    return (
+        select(AICounsellorChat.conversation_id)
+        .where(AICounsellorChat.user_id == user_id)
+        .order_by(AICounsellorChat.created_at.desc())
+        .limit(1)
+    )
+
+
+def history_page_query(user_id, conversation_id, before: Optional[Tuple[datetime, uuid.UUID]], limit: int) -> Select:
+    """Newest-first page of at most `limit + 1` rows (the extra row tells us whether there is more)."""
+    query = (
+        select(
+            AICounsellorChat.id,
+            AICounsellorChat.role,
+            AICounsellorChat.content,
+            AICounsellorChat.created_at,
+        )
+        .where(
+            AICounsellorChat.user_id == user_id,
+            AICounsellorChat.conversation_id == conversation_id,
+        )
+        .order_by(AICounsellorChat.created_at.desc(), AICounsellorChat.id.desc())
+        .limit(limit + 1)
+    )
+    if before is not None:
+        created_at, chat_id = before
+        query = query.where(
+            or_(
+                AICounsellorChat.created_at < created_at,
+                and_(AICounsellorChat.created_at == created_at, AICounsellorChat.id < chat_id),
+            )
+        )
+    return query
+
+
+def _page(conversation_id, rows: List, limit: int) -> Dict:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    # Oldest row on this page; the next page continues before it
+    next_cursor = encode_cursor(conversation_id, rows[-1].created_at, rows[-1].id) if has_more else None
+    return {
+        # Oldest first, the order the client renders them in
+        "messages": [
+            {
+                "id": str(row.id),
+                "role": row.role,
+                "content": row.content,
+                "timestamp": row.created_at.isoformat() if row.created_at else None,
+            }
+            for row in reversed(rows)
+        ],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
+async def get_history_page_async(
+    db: AsyncSession,
+    user_id,
+    conversation_id=None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Dict:
+    """
+    One page of a conversation: the cursor's conversation when paging, else
+    `conversation_id`, else the user's latest one. Raises InvalidCursor for a
+    malformed cursor or one issued for a different conversation.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    before = None
+    if cursor:
+        cursor_conversation_id, created_at, chat_id = decode_cursor(cursor)
+        if conversation_id is not None and conversation_id != cursor_conversation_id:
+            raise InvalidCursor("History cursor belongs to a different conversation")
+        conversation_id = cursor_conversation_id
+        before = (created_at, chat_id)
+
+    if conversation_id is None:
+        conversation_id = await db.scalar(latest_conversation_query(user_id))
+        if conversation_id is None:
+            return {"messages": [], "conversation_id": None, "next_cursor": None, "has_more": False}
+
+    rows = (await db.execute(history_page_query(user_id, conversation_id, before, limit))).all()
+    return {**_page(conversation_id, rows, limit), "conversation_id": str(conversation_id)}
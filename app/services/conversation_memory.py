@@ -0,0 +1,240 @@
+"""
+Rolling-summary memory for counsellor conversations.
+
+Each prompt is the system prompt, the stored summary of older turns (if any),
+and the most recent messages that fit in COUNSELLOR_HISTORY_TOKEN_BUDGET.
+When messages fall out of that window, a background task folds them into the
+summary so nothing is lost and prompt size stays bounded however long the
+conversation gets.
+
+Summarizing keeps only about half the budget of recent turns unsummarized, so
+a long conversation needs a new summary every few turns rather than every turn.
+"""
+
+import asyncio
+import uuid
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    COUNSELLOR_HISTORY_TOKEN_BUDGET,
+    COUNSELLOR_SUMMARY_MAX_TOKENS,
+)
+from app.db.session import SessionLocal
+from app.models.ai_counsellor_chat import AICounsellorChat
+from app.models.conversation_summary import ConversationSummary
+from app.services.ai_service import AIProviderError, chat_completion_async
+
+SUMMARY_MODEL = "openai/gpt-oss-20b:free"
+
+# Upper bound on rows read per prompt / per summarization pass
+_MAX_WINDOW_MESSAGES = 100
+_MAX_FOLD_MESSAGES = 200
+
+# Conversations with a summarization task running in this process
+_pending: Set[uuid.UUID] = set()
+_tasks: Set[asyncio.Task] = set()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token, plus per-message overhead)."""
+    return len(text or "") // 4 + 4
+
+
+def _get_summary(db: Session, user_id, conversation_id) -> Optional[ConversationSummary]:
+    return (
+        db.query(ConversationSummary)
+        .filter(
+            ConversationSummary.conversation_id == conversation_id,
+            ConversationSummary.user_id == user_id,
+        )
+        .first()
+    )
+
+
+def _unsummarized_query(user_id, conversation_id, summary: Optional[ConversationSummary]):
+    query = select(
+        AICounsellorChat.id,
+        AICounsellorChat.role,
+        AICounsellorChat.content,
+        AICounsellorChat.created_at,
+    ).where(
+        AICounsellorChat.user_id == user_id,
+        AICounsellorChat.conversation_id == conversation_id,
+    )
+    if summary is not None:
+        query = query.where(
+            or_(
+                AICounsellorChat.created_at > summary.summarized_until,
+                and_(
+                    AICounsellorChat.created_at == summary.summarized_until,
+                    AICounsellorChat.id > summary.summarized_until_id,
+                ),
+            )
+        )
+    return query
+
+
+def _take_recent(rows_newest_first: List, budget: int) -> List:
+    """The newest rows that fit in `budget` tokens (at least one), oldest first."""
+    window, used = [], 0
+    for row in rows_newest_first:
+        cost = estimate_tokens(row.content)
+        if window and used + cost > budget:
+            break
+        window.append(row)
+        used += cost
+    window.reverse()
+    return window
+
+
+def build_history(db: Session, user_id, conversation_id) -> Tuple[List[Dict], bool]:
+    """
+    Prompt messages (summary + recent window) for a conversation, and whether
+    older unsummarized messages were left out and should be summarized.
+    """
+    summary = _get_summary(db, user_id, conversation_id)
+    rows = db.execute(
+        _unsummarized_query(user_id, conversation_id, summary)
+        .order_by(AICounsellorChat.created_at.desc(), AICounsellorChat.id.desc())
+        .limit(_MAX_WINDOW_MESSAGES)
+    ).all()
+
+    window = _take_recent(rows, COUNSELLOR_HISTORY_TOKEN_BUDGET)
+
+    messages = []
+    if summary is not None:
+        messages.append({
+            "role": "system",
+            "content": f"Summary of the earlier conversation with this student:\n{summary.summary}",
+        })
+    messages.extend({"role": row.role, "content": row.content} for row in window)
+
+    return messages, len(window) < len(rows)
+
+
+# =========================
+# BACKGROUND SUMMARIZATION
+# =========================
+
+def _summary_prompt(previous: Optional[str], rows: List) -> List[Dict]:
+    transcript = "\n".join(f"{row.role.upper()}: {row.content}" for row in rows)
+    parts = []
+    if previous:
+        parts.append(f"Existing summary:\n{previous}")
+    parts.append(f"New messages:\n{transcript}")
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You maintain a running summary of a conversation between a student and a study-abroad "
+                "counsellor. Merge the new messages into the existing summary. Keep the student's goals, "
+                "decisions, concerns and any advice or commitments made. Be concise; plain text, no preamble."
+            ),
+        },
+        {"role": "user", "content": "\n\n".join(parts)},
+    ]
+
+
+def _load_fold(user_id, conversation_id):
+    """Summary row state and the oldest unsummarized rows to fold (leaving about half the budget)."""
+    db = SessionLocal()
+    try:
+        summary = _get_summary(db, user_id, conversation_id)
+        rows = db.execute(
+            _unsummarized_query(user_id, conversation_id, summary)
+            .order_by(AICounsellorChat.created_at.asc(), AICounsellorChat.id.asc())
+            .limit(_MAX_FOLD_MESSAGES)
+        ).all()
+        keep = _take_recent(list(reversed(rows)), COUNSELLOR_HISTORY_TOKEN_BUDGET // 2)
+        fold = rows[:len(rows) - len(keep)]
+        previous = None
+        if summary is not None:
+            previous = {
+                "summary": summary.summary,
+                "summarized_until": summary.summarized_until,
+                "summarized_until_id": summary.summarized_until_id,
+                "summarized_messages": summary.summarized_messages,
+            }
+        return previous, fold
+    finally:
+        db.close()
+
+
+def _store_summary(user_id, conversation_id, previous: Optional[Dict], fold: List, text: str) -> bool:
+    """Upsert the summary unless another worker advanced it in the meantime."""
+    last = fold[-1]
+    values = {
+        "user_id": user_id,
+        "conversation_id": conversation_id,
+        "summary": text,
+        "summarized_until": last.created_at,
+        "summarized_until_id": last.id,
+        "summarized_messages": (previous["summarized_messages"] if previous else 0) + len(fold),
+    }
+    stmt = pg_insert(ConversationSummary).values(id=uuid.uuid4(), **values)
+    if previous is None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[ConversationSummary.conversation_id])
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ConversationSummary.conversation_id],
+            set_={key: stmt.excluded[key] for key in values if key not in ("user_id", "conversation_id")},
+            where=and_(
+                ConversationSummary.summarized_until == previous["summarized_until"],
+                ConversationSummary.summarized_until_id == previous["summarized_until_id"],
+            ),
+        )
+
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt)
+        db.commit()
+        return result.rowcount > 0
+    finally:
+        db.close()
+
+
+async def summarize_conversation(user_id, conversation_id) -> None:
+    """Fold the older unsummarized turns of a conversation into its summary."""
+    previous, fold = await run_in_threadpool(_load_fold, user_id, conversation_id)
+    if not fold:
+        return
+
+    text = await chat_completion_async(
+        _summary_prompt(previous["summary"] if previous else None, fold),
+        model=SUMMARY_MODEL,
+        temperature=0.2,
+        max_tokens=COUNSELLOR_SUMMARY_MAX_TOKENS,
+    )
+    if not text.strip():
+        return
+
+    stored = await run_in_threadpool(_store_summary, user_id, conversation_id, previous, fold, text.strip())
+    if stored:
+        print(f"📝 Summarized {len(fold)} messages of conversation {conversation_id}")
+
+
+async def _run_summary(user_id, conversation_id) -> None:
+    try:
+        await summarize_conversation(user_id, conversation_id)
+    except AIProviderError as e:
+        print(f"⚠️ Conversation summary failed for {conversation_id}: {e}")
+    except Exception as e:
+        print(f"❌ Conversation summary error for {conversation_id}: {e}")
+    finally:
+        _pending.discard(conversation_id)
+
+
+def schedule_summary(user_id, conversation_id) -> None:
+    """Start a background summarization for the conversation unless one is already running here."""
+    if conversation_id in _pending:
+        return
+    _pending.add(conversation_id)
+    task = asyncio.get_running_loop().create_task(_run_summary(user_id, conversation_id))
+    # Keep a reference so the task is not garbage-collected mid-run
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -0,0 +1,46 @@
+"""
+Per-user cache of the rendered counsellor context.
+
+The counsellor system prompt is built from the user's profile, locked
+university and shortlist, which change only a few times in a user's
+lifetime. Instead of re-running those queries and re-serializing them on
+every chat message, the rendered prompt (and the first name used for
+greetings) is kept per user id for COUNSELLOR_CONTEXT_TTL_SECONDS.
+
+Anything that changes the profile, shortlist or locked university must call
+`counsellor_context_cache.invalidate(user.id)` after committing. The cache
+is per process, so other workers can serve the old context for up to the TTL.
+"""
+
+from typing import Dict, Optional
+
+from app.core.config import COUNSELLOR_CONTEXT_CACHE_SIZE, COUNSELLOR_CONTEXT_TTL_SECONDS
+from app.core.ttl_cache import TTLCache
+
+
+class CounsellorContextCache:
+    """LRU of rendered counsellor contexts keyed by user id, with a TTL."""
+
+    def __init__(
+        self,
+        max_size: int = COUNSELLOR_CONTEXT_CACHE_SIZE,
+        ttl_seconds: float = COUNSELLOR_CONTEXT_TTL_SECONDS,
+    ):
+        self._cache = TTLCache(max_size, ttl_seconds)
+        self.invalidations = 0
+
+    def get(self, user_id) -> Optional[Dict]:
+        return self._cache.get(str(user_id))
+
+    def put(self, user_id, context: Dict) -> None:
+        self._cache.put(str(user_id), context)
+
+    def invalidate(self, user_id) -> None:
+        if self._cache.pop(str(user_id)):
+            self.invalidations += 1
+
+    def stats(self):
+        return {**self._cache.stats(), "invalidations": self.invalidations}
+
+
+counsellor_context_cache = CounsellorContextCache()
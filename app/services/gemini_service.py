@@ -8,25 +8,49 @@ Features:
 - Basic text generation with Gemini
 - Chat-style Q&A with system prompts
 - University recommendations with JSON output
+- Async variants for non-blocking endpoints
 - JSON parsing helpers
 """
 
 import os
 import json
-import google.generativeai as genai
-from typing import List, Dict, Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+from app.services.json_stream import JSONArrayStreamParser, extract_json_array
+from app.services.single_flight import llm_single_flight
+
 load_dotenv()
 
 # ======================================================
 # 🔑 Gemini API Config
 # ======================================================
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise RuntimeError("GEMINI_API_KEY is not set in .env")
 
-genai.configure(api_key=GEMINI_API_KEY)
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def get_genai():
+    """
+    Import and configure the Gemini SDK on first use. The SDK is slow to
+    import, so importing this module (and app.main) does not pay for it.
+    """
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                if not GEMINI_API_KEY:
+                    raise RuntimeError("GEMINI_API_KEY is not set in .env")
+
+                import google.generativeai as genai
+
+                genai.configure(api_key=GEMINI_API_KEY)
+                _genai = genai
+    return _genai
 
 # Default model configuration
 DEFAULT_MODEL = "gemini-2.5-flash"
@@ -51,22 +75,6 @@ SAFETY_SETTINGS = [
 # ======================================================
 # 🧠 Lenient JSON extractor
 # ======================================================
-def extract_json_array(text: str) -> List[Dict]:
-    """
-    Safely extracts a JSON array from AI output.
-    Never throws.
-    """
-    try:
-        start = text.find("[")
-        end = text.rfind("]")
-        if start != -1 and end != -1 and end > start:
-            return json.loads(text[start:end + 1])
-    except Exception:
-        pass
-
-    return []
-
-
 def extract_json_object(text: str) -> Optional[Dict]:
     """
     Safely extracts a JSON object from AI output.
@@ -86,9 +94,83 @@ def extract_json_object(text: str) -> Optional[Dict]:
 # ======================================================
 # 🤖 Gemini Model Initialization
 # ======================================================
+class GeminiModelRegistry:
+    """
+    Caches configured GenerativeModel instances per (model name, config) so
+    calls don't rebuild them, and records per-model call counts and latency.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def get(self, model_name: str = DEFAULT_MODEL, generation_config: Optional[Dict] = None):
+        config = generation_config or GENERATION_CONFIG
+        key = (model_name, json.dumps(config, sort_keys=True))
+
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = get_genai().GenerativeModel(
+                        model_name=model_name,
+                        generation_config=config,
+                        safety_settings=SAFETY_SETTINGS,
+                    )
+                    self._models[key] = model
+        return model
+
+    def warm(self, model_names: List[str]) -> None:
+        """Pre-create models with the default config."""
+        for model_name in model_names:
+            self.get(model_name)
+        print(f"🔵 Gemini models ready: {', '.join(model_names)}")
+
+    @contextmanager
+    def track(self, model_name: str):
+        """Time one upstream call and count it (and whether it failed) against the model."""
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                stats = self._stats.setdefault(
+                    model_name, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+                )
+                stats["calls"] += 1
+                stats["errors"] += int(failed)
+                stats["total_ms"] += elapsed_ms
+                stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "cached_models": len(self._models),
+                "models": {
+                    name: {
+                        "calls": int(s["calls"]),
+                        "errors": int(s["errors"]),
+                        "avg_ms": round(s["total_ms"] / s["calls"], 1) if s["calls"] else 0.0,
+                        "max_ms": round(s["max_ms"], 1),
+                    }
+                    for name, s in self._stats.items()
+                },
+            }
+
+
+gemini_models = GeminiModelRegistry()
+
+
 def get_gemini_model(model_name: str = DEFAULT_MODEL):
     """
-    Get a configured Gemini model instance.
+    Get a configured Gemini model instance (cached per model name and config).
     
     Args:
         model_name: The Gemini model to use (gemini-1.5-flash or gemini-1.5-pro)
@@ -96,11 +178,7 @@ def get_gemini_model(model_name: str = DEFAULT_MODEL):
     Returns:
         Configured GenerativeModel instance
     """
-    return genai.GenerativeModel(
-        model_name=model_name,
-        generation_config=GENERATION_CONFIG,
-        safety_settings=SAFETY_SETTINGS,
-    )
+    return gemini_models.get(model_name)
 
 
 def start_chat_session(model_name: str = DEFAULT_MODEL):
@@ -120,6 +198,36 @@ def start_chat_session(model_name: str = DEFAULT_MODEL):
 # ======================================================
 # 🚀 Basic Text Generation
 # ======================================================
+def _build_contents(prompt: str, system_prompt: Optional[str] = None):
+    """Build the generate_content payload for a prompt with an optional system prompt."""
+    if system_prompt:
+        return [
+            {"role": "user", "parts": [system_prompt]},
+            {"role": "user", "parts": [prompt]},
+        ]
+    return prompt
+
+
+def _build_chat_contents(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    chat_history: Optional[List[Dict]] = None,
+) -> List[Dict]:
+    """Build Gemini content parts from a system prompt, chat history and the new question."""
+    content_parts = []
+    
+    if system_prompt:
+        content_parts.append({"role": "model", "parts": [system_prompt]})
+    
+    if chat_history:
+        for msg in chat_history:
+            role = "model" if msg.get("role") == "assistant" else "user"
+            content_parts.append({"role": role, "parts": [msg.get("content", "")]})
+    
+    content_parts.append({"role": "user", "parts": [prompt]})
+    return content_parts
+
+
 def generate_content(
     prompt: str,
     system_prompt: Optional[str] = None,
@@ -139,16 +247,12 @@ def generate_content(
     try:
         model_instance = get_gemini_model(model)
         
-        if system_prompt:
-            response = model_instance.generate_content([
-                {"role": "user", "parts": [system_prompt]},
-                {"role": "user", "parts": [prompt]},
-            ])
-        else:
-            response = model_instance.generate_content(prompt)
+        with gemini_models.track(model):
+            response = model_instance.generate_content(_build_contents(prompt, system_prompt))
+            text = response.text
         
         print(f"🔵 Gemini ({model}) response generated successfully")
-        return response.text
+        return text
     
     except Exception as e:
         print(f"❌ Gemini generation error: {e}")
@@ -179,23 +283,14 @@ def ask_gemini(
     try:
         model_instance = get_gemini_model(model)
         
-        # Build content parts
-        content_parts = []
+        content_parts = _build_chat_contents(prompt, system_prompt, chat_history)
         
-        if system_prompt:
-            content_parts.append({"role": "model", "parts": [system_prompt]})
-        
-        if chat_history:
-            for msg in chat_history:
-                role = "model" if msg.get("role") == "assistant" else "user"
-                content_parts.append({"role": role, "parts": [msg.get("content", "")]})
-        
-        content_parts.append({"role": "user", "parts": [prompt]})
-        
-        response = model_instance.generate_content(content_parts)
+        with gemini_models.track(model):
+            response = model_instance.generate_content(content_parts)
+            text = response.text
         
         print(f"🔵 Gemini chat response generated")
-        return response.text
+        return text
     
     except Exception as e:
         print(f"❌ Gemini chat error: {e}")
@@ -205,28 +300,14 @@ def ask_gemini(
 # ======================================================
 # 🎓 University Recommendations with Gemini
 # ======================================================
-def get_gemini_recommendations(
+def build_recommendations_prompt(
     budget_range: Optional[str] = None,
     target_country: Optional[str] = None,
     target_field: Optional[str] = None,
     target_degree: Optional[str] = "Bachelors",
     major: Optional[str] = None,
-    model: str = DEFAULT_MODEL,
-) -> List[Dict]:
-    """
-    Generate personalized university recommendations using Gemini.
-    
-    Args:
-        budget_range: User's budget range (e.g., "20000-50000" USD)
-        target_country: Country the user wants to study in
-        target_field: Field of study/major
-        target_degree: Degree type (Bachelors, Masters, PhD)
-        major: User's major/field of study
-        model: Gemini model to use
-    
-    Returns:
-        List of university recommendations with structured data
-    """
+) -> str:
+    """Build the strict-JSON recommendation prompt for a student profile."""
     # Build detailed prompt based on user preferences
     prompt_parts = [
         "You are an expert international education counsellor.",
@@ -275,32 +356,223 @@ def get_gemini_recommendations(
         + "- difficulty must be LOW, MEDIUM, or HIGH\n"
     )
     
+    return full_prompt
+
+
+def _is_valid_university(uni) -> bool:
+    return isinstance(uni, dict) and "name" in uni and "country" in uni
+
+
+def _clean_universities(text: str) -> List[Dict]:
+    """Parse Gemini output into at most 12 university dicts with a name and country."""
+    print("🔵 Gemini raw text:\n", text)
+    
+    universities = extract_json_array(text)
+    
+    # Final strict cleanup
+    clean = [uni for uni in universities if _is_valid_university(uni)]
+    
+    print(f"🔵 Gemini extracted {len(clean)} valid universities")
+    return clean[:12]
+
+
+def get_gemini_recommendations(
+    budget_range: Optional[str] = None,
+    target_country: Optional[str] = None,
+    target_field: Optional[str] = None,
+    target_degree: Optional[str] = "Bachelors",
+    major: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+) -> List[Dict]:
+    """
+    Generate personalized university recommendations using Gemini.
+    
+    Args:
+        budget_range: User's budget range (e.g., "20000-50000" USD)
+        target_country: Country the user wants to study in
+        target_field: Field of study/major
+        target_degree: Degree type (Bachelors, Masters, PhD)
+        major: User's major/field of study
+        model: Gemini model to use
+    
+    Returns:
+        List of university recommendations with structured data
+    """
+    full_prompt = build_recommendations_prompt(
+        budget_range=budget_range,
+        target_country=target_country,
+        target_field=target_field,
+        target_degree=target_degree,
+        major=major,
+    )
+    
+    def _generate() -> List[Dict]:
+        try:
+            model_instance = get_gemini_model(model)
+            
+            with gemini_models.track(model):
+                response = model_instance.generate_content(full_prompt)
+                text = response.text
+            return _clean_universities(text)
+        
+        except Exception as e:
+            print(f"❌ Gemini recommendations error: {e}")
+            return []
+    
+    # Identical concurrent prompts share one upstream call
+    key = llm_single_flight.make_key(model, full_prompt, GENERATION_CONFIG)
+    return llm_single_flight.do(key, _generate)
+
+
+# ======================================================
+# ⚡ Async Variants (non-blocking, for async endpoints)
+# ======================================================
+async def generate_content_async(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+) -> str:
+    """
+    Async version of generate_content using the SDK's async generation API.
+    
+    Returns:
+        Generated text response, or "" on failure
+    """
+    try:
+        model_instance = get_gemini_model(model)
+        
+        with gemini_models.track(model):
+            response = await model_instance.generate_content_async(_build_contents(prompt, system_prompt))
+            text = response.text
+        
+        print(f"🔵 Gemini ({model}) async response generated successfully")
+        return text
+    
+    except Exception as e:
+        print(f"❌ Gemini async generation error: {e}")
+        return ""
+
+
+async def ask_gemini_async(
+    prompt: str,
+    system_prompt: str = "You are a helpful AI assistant.",
+    model: str = DEFAULT_MODEL,
+    chat_history: Optional[List[Dict]] = None,
+) -> str:
+    """
+    Async version of ask_gemini.
+    
+    Returns:
+        AI response text, or "" on failure
+    """
     try:
         model_instance = get_gemini_model(model)
         
-        response = model_instance.generate_content(full_prompt)
-        text = response.text
+        content_parts = _build_chat_contents(prompt, system_prompt, chat_history)
         
-        print("🔵 Gemini raw text:\n", text)
+        with gemini_models.track(model):
+            response = await model_instance.generate_content_async(content_parts)
+            text = response.text
         
-        universities = extract_json_array(text)
+        print(f"🔵 Gemini async chat response generated")
+        return text
+    
+    except Exception as e:
+        print(f"❌ Gemini async chat error: {e}")
+        return ""
+
+
+async def get_gemini_recommendations_async(
+    budget_range: Optional[str] = None,
+    target_country: Optional[str] = None,
+    target_field: Optional[str] = None,
+    target_degree: Optional[str] = "Bachelors",
+    major: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+) -> List[Dict]:
+    """
+    Async version of get_gemini_recommendations.
+    
+    Returns:
+        List of university recommendations, or [] on failure
+    """
+    full_prompt = build_recommendations_prompt(
+        budget_range=budget_range,
+        target_country=target_country,
+        target_field=target_field,
+        target_degree=target_degree,
+        major=major,
+    )
+    
+    async def _generate() -> List[Dict]:
+        try:
+            model_instance = get_gemini_model(model)
+            
+            with gemini_models.track(model):
+                response = await model_instance.generate_content_async(full_prompt)
+                text = response.text
+            return _clean_universities(text)
         
-        # Final strict cleanup
-        clean = []
-        for uni in universities:
-            if (
-                isinstance(uni, dict)
-                and "name" in uni
-                and "country" in uni
-            ):
-                clean.append(uni)
+        except Exception as e:
+            print(f"❌ Gemini async recommendations error: {e}")
+            return []
+    
+    # Identical concurrent prompts share one upstream call
+    key = llm_single_flight.make_key(model, full_prompt, GENERATION_CONFIG)
+    return await llm_single_flight.do_async(key, _generate)
+
+
+async def stream_gemini_recommendations_async(
+    budget_range: Optional[str] = None,
+    target_country: Optional[str] = None,
+    target_field: Optional[str] = None,
+    target_degree: Optional[str] = "Bachelors",
+    major: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+) -> AsyncIterator[Dict]:
+    """
+    Stream recommendations from Gemini, yielding each university as soon as
+    its JSON object is complete. Stops after 12; yields nothing on failure.
+
+    Streaming calls are not coalesced by single-flight, since each caller
+    consumes its own response stream.
+    """
+    full_prompt = build_recommendations_prompt(
+        budget_range=budget_range,
+        target_country=target_country,
+        target_field=target_field,
+        target_degree=target_degree,
+        major=major,
+    )
+    parser = JSONArrayStreamParser()
+    count = 0
+
+    try:
+        model_instance = get_gemini_model(model)
         
-        print(f"🔵 Gemini extracted {len(clean)} valid universities")
-        return clean[:12]
+        # Time to first chunk; tracked separately so it doesn't skew full-call latency
+        with gemini_models.track(f"{model} (stream)"):
+            response = await model_instance.generate_content_async(full_prompt, stream=True)
+        async for chunk in response:
+            for uni in parser.feed(chunk.text):
+                if _is_valid_university(uni):
+                    count += 1
+                    yield uni
+                    if count >= 12:
+                        return
+            if parser.finished:
+                break
+        
+        for uni in parser.close():
+            if _is_valid_university(uni) and count < 12:
+                count += 1
+                yield uni
     
     except Exception as e:
-        print(f"❌ Gemini recommendations error: {e}")
-        return []
+        print(f"❌ Gemini streaming recommendations error: {e}")
+    
+    finally:
+        print(f"🔵 Gemini streamed {count} valid universities ({parser.skipped} malformed skipped)")
 
 
 # ======================================================
@@ -0,0 +1,228 @@
+"""
+Shared HTTP clients for outbound API calls (OpenRouter).
+
+One sync and one async httpx client are kept for the life of the process, so
+LLM calls reuse pooled keep-alive connections (HTTP/2 when the `h2` package
+is installed) instead of paying DNS, TCP and TLS setup on every request.
+They are created at startup and closed at shutdown by app.main. Outside the
+app (scripts, the standalone worker) the sync client is created lazily on
+first use; async calls made on any loop other than the app's get a
+short-lived client that is closed before the call returns, since pooled
+connections cannot outlive the event loop they were opened on.
+
+Requests go through `request_with_retries` / `arequest_with_retries` /
+`astream_with_retries`, which retry 429 and 5xx responses and connection
+failures up to HTTP_MAX_RETRIES times with full-jitter exponential backoff,
+honouring a numeric Retry-After header. Only failures to get a connection
+are retried, never a connection that broke after the request was sent, so a
+POST is not replayed. Streams are only retried before the first byte of the
+body has been handed to the caller.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.core.config import (
+    HTTP_BACKOFF_BASE_SECONDS,
+    HTTP_BACKOFF_MAX_SECONDS,
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_MAX_RETRIES,
+    HTTP_READ_TIMEOUT_SECONDS,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Failures before the request was sent, so it is safe to send again. Not
+# RemoteProtocolError: the server may already have received (and billed) it
+RETRY_EXCEPTIONS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def make_timeout(read_seconds: Optional[float] = None) -> httpx.Timeout:
+    """Separate connect and read timeouts; `read_seconds` overrides the default read/write timeout."""
+    read = read_seconds if read_seconds is not None else HTTP_READ_TIMEOUT_SECONDS
+    return httpx.Timeout(read, connect=HTTP_CONNECT_TIMEOUT_SECONDS, pool=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+
+def backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After if it gave a number."""
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), HTTP_BACKOFF_MAX_SECONDS)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX_SECONDS, HTTP_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+class SharedHTTPClients:
+    """Process-wide pooled httpx clients, created on start() or first use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync: Optional[httpx.Client] = None
+        self._async: Optional[httpx.AsyncClient] = None
+        self._async_loop = None
+        self.http2 = _http2_available()
+        self.requests = 0
+        self.retries = 0
+
+    def _options(self) -> Dict:
+        return {
+            "http2": self.http2,
+            "timeout": make_timeout(),
+            "limits": httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        }
+
+    def sync_client(self) -> httpx.Client:
+        with self._lock:
+            if self._sync is None:
+                self._sync = httpx.Client(**self._options())
+            return self._sync
+
+    @asynccontextmanager
+    async def async_client(self) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        The shared async client when running on the loop it was started on.
+        Its pooled connections belong to that loop, so any other loop (e.g. a
+        script's asyncio.run) gets a client that is closed on exit instead of
+        one that would be left open when the loop goes away.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            shared = self._async if self._async_loop is loop else None
+        if shared is not None:
+            yield shared
+            return
+
+        async with httpx.AsyncClient(**self._options()) as client:
+            yield client
+
+    async def start(self) -> None:
+        self.sync_client()
+        with self._lock:
+            if self._async is None:
+                self._async = httpx.AsyncClient(**self._options())
+                self._async_loop = asyncio.get_running_loop()
+        if not self.http2:
+            print("⚠️ h2 is not installed; outbound HTTP uses HTTP/1.1 keep-alive")
+
+    async def aclose(self) -> None:
+        with self._lock:
+            sync_client, async_client = self._sync, self._async
+            self._sync = self._async = self._async_loop = None
+        if async_client is not None:
+            await async_client.aclose()
+        if sync_client is not None:
+            sync_client.close()
+
+    def count(self, retried: bool) -> None:
+        with self._lock:
+            if retried:
+                self.retries += 1
+            else:
+                self.requests += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "http2": self.http2,
+                "sync_open": self._sync is not None,
+                "async_open": self._async is not None,
+                "requests": self.requests,
+                "retries": self.retries,
+            }
+
+
+http_clients = SharedHTTPClients()
+
+
+def request_with_retries(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request on the shared sync client, retrying 429/5xx and connection failures."""
+    client = http_clients.sync_client()
+    http_clients.count(retried=False)
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        last_attempt = attempt == HTTP_MAX_RETRIES
+        try:
+            response = client.request(method, url, **kwargs)
+        except RETRY_EXCEPTIONS:
+            if last_attempt:
+                raise
+            response = None
+        else:
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                return response
+        http_clients.count(retried=True)
+        time.sleep(backoff_delay(attempt, response))
+
+
+async def arequest_with_retries(method: str, url: str, **kwargs) -> httpx.Response:
+    """Async variant of request_with_retries."""
+    http_clients.count(retried=False)
+    async with http_clients.async_client() as client:
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            last_attempt = attempt == HTTP_MAX_RETRIES
+            try:
+                response = await client.request(method, url, **kwargs)
+            except RETRY_EXCEPTIONS:
+                if last_attempt:
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    return response
+            http_clients.count(retried=True)
+            await asyncio.sleep(backoff_delay(attempt, response))
+
+
+@asynccontextmanager
+async def astream_with_retries(method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+    """
+    Open a streaming response on the shared async client. Retries happen only
+    while opening (status line and headers); the body is never replayed.
+    """
+    http_clients.count(retried=False)
+    async with http_clients.async_client() as client:
+        attempt = 0
+        while True:
+            last_attempt = attempt == HTTP_MAX_RETRIES
+            response = None
+            try:
+                response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+            except RETRY_EXCEPTIONS:
+                if last_attempt:
+                    raise
+
+            if response is not None and (response.status_code not in RETRY_STATUSES or last_attempt):
+                break
+
+            if response is not None:
+                await response.aclose()
+            http_clients.count(retried=True)
+            await asyncio.sleep(backoff_delay(attempt, response))
+            attempt += 1
+
+        try:
+            yield response
+        finally:
+            await response.aclose()
@@ -0,0 +1,191 @@
+"""
+Incremental parser for JSON arrays in LLM output.
+
+LLMs return university lists as a JSON array, often wrapped in markdown
+fences or prose, sometimes truncated by the token limit, and occasionally
+with one broken element. `JSONArrayStreamParser` consumes the response as it
+streams and hands back each top-level array element as soon as it is
+complete. Malformed elements are repaired where possible (trailing commas,
+Python literals, an unterminated final element) and skipped otherwise, so
+one bad element no longer throws away the whole batch.
+"""
+
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_PYTHON_LITERALS = re.compile(r"\b(True|False|None)\b")
+_PYTHON_TO_JSON = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _loads_lenient(text: str) -> Optional[Any]:
+    """json.loads, retrying with common LLM mistakes fixed. Returns None if unparseable."""
+    text = text.strip()
+    if not text:
+        return None
+
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    repaired = _TRAILING_COMMA.sub(r"\1", text)
+    repaired = _PYTHON_LITERALS.sub(lambda m: _PYTHON_TO_JSON[m.group(1)], repaired)
+    try:
+        return json.loads(repaired)
+    except ValueError:
+        return None
+
+
+class JSONArrayStreamParser:
+    """
+    Feed text chunks with `feed()`; each call returns the array elements that
+    were completed by that chunk. Call `close()` at the end of the stream to
+    flush (and try to repair) a trailing element.
+
+    Text before the opening "[" is ignored. If the output starts with "{"
+    instead, the objects are treated as elements of an implicit array.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._finished = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._element: List[str] = []
+        self.parsed = 0
+        self.skipped = 0
+
+    @property
+    def finished(self) -> bool:
+        """True once the closing "]" of the array has been seen."""
+        return self._finished
+
+    def _emit(self, text: str, out: List[Any]) -> None:
+        value = _loads_lenient(text)
+        if value is None:
+            if text.strip():
+                self.skipped += 1
+            return
+        self.parsed += 1
+        out.append(value)
+
+    def _flush_scalar(self, out: List[Any]) -> None:
+        text = "".join(self._element)
+        self._element = []
+        self._emit(text, out)
+
+    def feed(self, chunk: str) -> List[Any]:
+        out: List[Any] = []
+        if self._finished or not chunk:
+            return out
+
+        for ch in chunk:
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                elif ch == "{":
+                    # No opening bracket: treat the objects as an implicit array
+                    self._started = True
+                    self._stack.append("{")
+                    self._element.append(ch)
+                continue
+
+            if self._in_string:
+                self._element.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if self._stack:
+                # Inside a nested element
+                self._element.append(ch)
+                if ch == '"':
+                    self._in_string = True
+                elif ch in _CLOSERS:
+                    self._stack.append(ch)
+                elif ch in "}]":
+                    self._stack.pop()
+                    if not self._stack:
+                        self._flush_scalar(out)
+                continue
+
+            # At the top level of the array, between elements
+            if ch == "]":
+                self._flush_scalar(out)
+                self._finished = True
+                break
+            if ch == ",":
+                self._flush_scalar(out)
+                continue
+            if ch in _CLOSERS:
+                if "".join(self._element).strip():
+                    # Junk before a new element (e.g. a missing comma)
+                    self._flush_scalar(out)
+                self._stack.append(ch)
+                self._element.append(ch)
+                continue
+            if ch == '"':
+                self._in_string = True
+            self._element.append(ch)
+
+        return out
+
+    def close(self) -> List[Any]:
+        """Flush the trailing element, closing any unterminated string or brackets."""
+        out: List[Any] = []
+        if self._finished or not self._element:
+            self._element = []
+            return out
+
+        text = "".join(self._element)
+        if self._in_string:
+            text += '"'
+        text += "".join(_CLOSERS[opener] for opener in reversed(self._stack))
+
+        self._element = []
+        self._stack = []
+        self._in_string = False
+        self._finished = True
+        self._emit(text, out)
+        return out
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """Yield array elements from a stream of text chunks as they complete."""
+    parser = JSONArrayStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.finished:
+            return
+    yield from parser.close()
+
+
+async def aiter_json_array(chunks: AsyncIterable[str]) -> AsyncIterator[Any]:
+    """Async version of iter_json_array."""
+    parser = JSONArrayStreamParser()
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+        if parser.finished:
+            return
+    for item in parser.close():
+        yield item
+
+
+def extract_json_array(text: str) -> List[Any]:
+    """
+    Safely extracts a JSON array from AI output, keeping every element that
+    parses. Never throws.
+    """
+    try:
+        return list(iter_json_array([text or ""]))
+    except Exception:
+        return []
@@ -5,6 +5,13 @@ from app.models.profile import Profile
 from app.models.user import User
 from app.models.task import Task
 from app.core.stages import STAGE
+from app.core.identity_cache import identity_cache
+from app.services.counsellor_context import counsellor_context_cache
+from app.services.recommendation_cache import (
+    profile_fingerprint,
+    invalidate_cached_recommendations,
+)
+from app.services.recommendation_jobs import enqueue_recommendation_job
 
 def complete_onboarding(
     db: Session,
@@ -28,7 +35,10 @@ def complete_onboarding(
 
     db.add(profile)
     db.add(user)
+    enqueue_recommendation_job(db, user.id, profile_fingerprint(profile))
     db.commit()
+    identity_cache.invalidate(user.id)
+    counsellor_context_cache.invalidate(user.id)
     db.refresh(user)
 
     return user
@@ -43,11 +53,19 @@ def update_user_profile(db: Session, user_id: str, profile_data: dict):
     if not profile:
         return None
 
+    old_fingerprint = profile_fingerprint(profile)
+
     for key, value in profile_data.items():
         if hasattr(profile, key):
             setattr(profile, key, value)
 
+    new_fingerprint = profile_fingerprint(profile)
+    if new_fingerprint != old_fingerprint:
+        invalidate_cached_recommendations(db, profile.user_id)
+        enqueue_recommendation_job(db, profile.user_id, new_fingerprint)
+
     db.commit()
+    counsellor_context_cache.invalidate(profile.user_id)
     db.refresh(profile)
     return profile
 
@@ -0,0 +1,309 @@
+"""
+Caches for university discovery results.
+
+Per-user tier: recommendations are stored in `cached_recommendations` together
+with a fingerprint of the profile fields that feed the Gemini prompt. A repeat
+visit with an unchanged profile is served straight from the database until the
+TTL expires; changing one of the fingerprinted fields invalidates the cache.
+
+Shared tier: users with the same normalized (degree, field, country, budget
+bucket, major) inputs share one generated list, held in an in-process LRU in
+front of the `shared_recommendations` table.
+"""
+
+import hashlib
+import json
+import re
+import string
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import RECOMMENDATION_CACHE_TTL_HOURS, SHARED_RECOMMENDATION_CACHE_SIZE
+from app.core.ttl_cache import TTLCache
+from app.models.cached_recommendation import CachedRecommendation
+from app.models.shared_recommendation import SharedRecommendation
+
+# Profile fields used to build the recommendation prompt
+PROFILE_FINGERPRINT_FIELDS = (
+    "budget_range",
+    "target_country",
+    "target_field",
+    "target_degree",
+    "major",
+)
+
+
+def profile_fingerprint(profile) -> str:
+    """Return a stable hash of the profile fields that drive recommendations."""
+    payload = {
+        field: str(getattr(profile, field, None) or "").strip().lower()
+        for field in PROFILE_FINGERPRINT_FIELDS
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def to_int(value, default: Optional[int] = 0) -> Optional[int]:
+    """Parse an AI or CSV number such as 25000, "25000.0" or "$25,000"; `default` if it isn't one."""
+    try:
+        return int(float(str(value).replace(",", "").replace("$", "")))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_cached_recommendations(db: Session, user_id: uuid.UUID, fingerprint: str) -> Optional[List[Dict]]:
+    """
+    Return the cached universities for this user if they were generated for the
+    same profile fingerprint and are still within the TTL, otherwise None.
+    """
+    rows = (
+        db.query(CachedRecommendation)
+        .filter(CachedRecommendation.user_id == user_id)
+        .order_by(CachedRecommendation.rank.asc())
+        .all()
+    )
+
+    if not rows:
+        return None
+
+    expires_before = datetime.utcnow() - timedelta(hours=RECOMMENDATION_CACHE_TTL_HOURS)
+    for row in rows:
+        if row.profile_hash != fingerprint or row.created_at < expires_before:
+            return None
+
+    return [
+        {
+            "id": str(row.university_id),
+            "name": row.university_name,
+            "country": row.country,
+            "degree": row.degree,
+            "field": row.field,
+            "estimated_tuition": row.estimated_tuition,
+            "difficulty": row.difficulty,
+        }
+        for row in rows
+    ]
+
+
+def store_cached_recommendations(
+    db: Session,
+    user_id: uuid.UUID,
+    fingerprint: str,
+    universities: List[Dict],
+) -> None:
+    """Replace the user's cached recommendations. Universities must carry database IDs."""
+    db.query(CachedRecommendation).filter(CachedRecommendation.user_id == user_id).delete()
+
+    now = datetime.utcnow()
+    for rank, uni in enumerate(universities):
+        if not uni.get("id"):
+            continue
+        db.add(CachedRecommendation(
+            user_id=user_id,
+            university_id=uuid.UUID(str(uni["id"])),
+            university_name=uni.get("name", "Unknown University"),
+            country=uni.get("country", "Unknown"),
+            degree=uni.get("degree", "Bachelors"),
+            field=uni.get("field", "Various"),
+            estimated_tuition=to_int(uni.get("estimated_tuition")),
+            difficulty=str(uni.get("difficulty", "MEDIUM")).upper(),
+            profile_hash=fingerprint,
+            rank=rank,
+            created_at=now,
+        ))
+
+    db.commit()
+
+
+def invalidate_cached_recommendations(db: Session, user_id: uuid.UUID) -> None:
+    """Drop the user's cached recommendations. The caller is responsible for committing."""
+    db.query(CachedRecommendation).filter(CachedRecommendation.user_id == user_id).delete()
+
+
+# ======================================================
+# 🌐 Shared cross-user cache
+# ======================================================
+DEGREE_ALIASES = {
+    "bachelor": "bachelors",
+    "bachelor's": "bachelors",
+    "undergraduate": "bachelors",
+    "ug": "bachelors",
+    "bsc": "bachelors",
+    "master": "masters",
+    "master's": "masters",
+    "postgraduate": "masters",
+    "pg": "masters",
+    "ms": "masters",
+    "msc": "masters",
+    "doctorate": "phd",
+    "ph.d": "phd",
+    "ph.d.": "phd",
+}
+
+COUNTRY_ALIASES = {
+    "us": "usa",
+    "u.s.": "usa",
+    "u.s.a.": "usa",
+    "united states": "usa",
+    "united states of america": "usa",
+    "america": "usa",
+    "u.k.": "uk",
+    "united kingdom": "uk",
+    "great britain": "uk",
+    "england": "uk",
+}
+
+# How normalized values are written to the catalog; anything else is title-cased
+CATALOG_SPELLINGS = {
+    "usa": "USA",
+    "uk": "UK",
+    "uae": "UAE",
+    "bachelors": "Bachelors",
+    "masters": "Masters",
+    "phd": "PhD",
+    "mba": "MBA",
+}
+
+# Budgets are bucketed to this granularity (USD per year)
+BUDGET_BUCKET_SIZE = 10000
+
+
+def _normalize_text(value) -> str:
+    return " ".join(str(value or "").lower().replace(",", " ").split())
+
+
+def normalize_degree(value) -> str:
+    degree = _normalize_text(value)
+    return DEGREE_ALIASES.get(degree, degree)
+
+
+def normalize_country(value) -> str:
+    country = _normalize_text(value)
+    return COUNTRY_ALIASES.get(country, country)
+
+
+def _catalog_spelling(normalized: str) -> str:
+    return CATALOG_SPELLINGS.get(normalized) or string.capwords(normalized)
+
+
+def catalog_degree(value) -> str:
+    """The one spelling of a degree stored in `universities` ("Master's", "masters" -> "Masters")."""
+    return _catalog_spelling(normalize_degree(value))
+
+
+def catalog_country(value) -> str:
+    """The one spelling of a country stored in `universities` ("usa", "United States" -> "USA")."""
+    return _catalog_spelling(normalize_country(value))
+
+
+def parse_budget_max(budget_range) -> Optional[float]:
+    """
+    Return the upper bound of a free-text budget ("$20,000 - $40,000",
+    "20k-40k", "20000-50000"), or None if it contains no amount.
+    """
+    text = str(budget_range or "").lower().replace(",", "")
+    amounts = []
+    for number, suffix in re.findall(r"(\d+(?:\.\d+)?)\s*(k?)", text):
+        amount = float(number) * (1000 if suffix == "k" else 1)
+        amounts.append(amount)
+
+    return max(amounts) if amounts else None
+
+
+def budget_bucket(budget_range) -> str:
+    """Map a free-text budget onto a coarse bucket keyed by its upper bound."""
+    upper = parse_budget_max(budget_range)
+    if upper is None:
+        return _normalize_text(budget_range) or "any"
+
+    bucket = int(-(-upper // BUDGET_BUCKET_SIZE) * BUDGET_BUCKET_SIZE)
+    return f"<={bucket}"
+
+
+def shared_key_tuple(profile) -> Tuple[str, str, str, str, str]:
+    """Return the normalized (degree, field, country, budget bucket, major) tuple."""
+    return (
+        normalize_degree(profile.target_degree),
+        _normalize_text(profile.target_field),
+        normalize_country(profile.target_country),
+        budget_bucket(profile.budget_range),
+        _normalize_text(profile.major),
+    )
+
+
+def shared_cache_key(key_tuple: Tuple[str, ...]) -> str:
+    return hashlib.sha256("|".join(key_tuple).encode("utf-8")).hexdigest()
+
+
+# In-process tier in front of shared_recommendations
+_shared_lru = TTLCache(
+    max_size=SHARED_RECOMMENDATION_CACHE_SIZE,
+    ttl_seconds=RECOMMENDATION_CACHE_TTL_HOURS * 3600,
+)
+
+
+def _remember_shared(key: str, universities: List[Dict], stored_at: datetime) -> None:
+    """Keep a shared list in the LRU until its database row expires."""
+    age = (datetime.utcnow() - stored_at).total_seconds()
+    _shared_lru.put(key, universities, ttl_seconds=RECOMMENDATION_CACHE_TTL_HOURS * 3600 - age)
+
+
+def get_shared_recommendations(db: Session, key_tuple: Tuple[str, ...]) -> Optional[List[Dict]]:
+    """Look up a shared list in the in-process LRU, then in the database."""
+    key = shared_cache_key(key_tuple)
+
+    universities = _shared_lru.get(key)
+    if universities is not None:
+        return [dict(uni) for uni in universities]
+
+    row = (
+        db.query(SharedRecommendation)
+        .filter(SharedRecommendation.cache_key == key)
+        .first()
+    )
+    if not row:
+        return None
+
+    expires_before = datetime.utcnow() - timedelta(hours=RECOMMENDATION_CACHE_TTL_HOURS)
+    if row.created_at < expires_before:
+        return None
+
+    _remember_shared(key, row.universities, row.created_at)
+    return [dict(uni) for uni in row.universities]
+
+
+def store_shared_recommendations(db: Session, key_tuple: Tuple[str, ...], universities: List[Dict]) -> None:
+    """Upsert the shared list for this key and populate the in-process LRU."""
+    key = shared_cache_key(key_tuple)
+    degree, field, country, bucket, major = key_tuple
+
+    # Per-user markers never belong in the shared entry
+    shared = [
+        {k: v for k, v in uni.items() if k != "is_shortlisted"}
+        for uni in universities
+        if uni.get("id")
+    ]
+    now = datetime.utcnow()
+
+    stmt = pg_insert(SharedRecommendation).values(
+        id=uuid.uuid4(),
+        cache_key=key,
+        degree=degree,
+        field=field,
+        country=country,
+        budget_bucket=bucket,
+        major=major,
+        universities=shared,
+        created_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SharedRecommendation.cache_key],
+        set_={"universities": stmt.excluded.universities, "created_at": stmt.excluded.created_at},
+    )
+    db.execute(stmt)
+    db.commit()
+
+    _remember_shared(key, shared, now)
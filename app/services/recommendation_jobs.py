@@ -0,0 +1,266 @@
+"""
+Background precomputation of university recommendations.
+
+Completing onboarding or changing a recommendation-relevant profile field
+enqueues a row in `recommendation_jobs`. A worker claims jobs with
+`FOR UPDATE SKIP LOCKED`, asks Gemini for recommendations and stores them in
+`ai_university_results`, so the discovery screen can serve them immediately.
+
+The queue lives in Postgres, so nothing beyond the app database is needed.
+The worker runs as a thread inside the API process (started from app.main),
+or standalone:
+
+    python -m app.services.recommendation_jobs
+"""
+
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, event, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    RECOMMENDATION_CACHE_TTL_HOURS,
+    RECOMMENDATION_JOB_MAX_ATTEMPTS,
+    RECOMMENDATION_JOB_POLL_SECONDS,
+    RECOMMENDATION_JOB_STALE_SECONDS,
+)
+from app.db.session import SessionLocal
+from app.models.ai_university import AIUniversityResult
+from app.models.profile import Profile
+from app.models.recommendation_job import RecommendationJob, RecommendationJobStatus
+from app.services.gemini_service import get_gemini_recommendations
+from app.services.recommendation_cache import (
+    profile_fingerprint,
+    shared_key_tuple,
+    store_shared_recommendations,
+)
+from app.services.university_service import bulk_upsert_ai_universities
+
+_ACTIVE_STATUSES = (RecommendationJobStatus.PENDING, RecommendationJobStatus.RUNNING)
+
+# Wakes the in-process worker once an enqueued job has been committed
+_job_enqueued = threading.Event()
+
+
+def _wake_worker(session: Session) -> None:
+    _job_enqueued.set()
+
+
+# ======================================================
+# 📥 Enqueue / lookup
+# ======================================================
+def enqueue_recommendation_job(db: Session, user_id: uuid.UUID, fingerprint: str) -> RecommendationJob:
+    """
+    Queue recommendation generation for this user's profile fingerprint, reusing
+    an active job for the same fingerprint. The caller is responsible for committing;
+    the worker is woken only after that commit, so it never looks for an
+    uncommitted job.
+    """
+    existing = (
+        db.query(RecommendationJob)
+        .filter(
+            RecommendationJob.user_id == user_id,
+            RecommendationJob.profile_hash == fingerprint,
+            RecommendationJob.status.in_(_ACTIVE_STATUSES),
+        )
+        .first()
+    )
+    if existing:
+        return existing
+
+    job = RecommendationJob(
+        user_id=user_id,
+        profile_hash=fingerprint,
+        status=RecommendationJobStatus.PENDING,
+    )
+    db.add(job)
+    event.listen(db, "after_commit", _wake_worker, once=True)
+    return job
+
+
+def get_precomputed_recommendations(db: Session, user_id: uuid.UUID, fingerprint: str) -> Optional[List[Dict]]:
+    """Return the stored result for this fingerprint if it is still within the cache TTL."""
+    result = (
+        db.query(AIUniversityResult)
+        .filter(AIUniversityResult.user_id == user_id)
+        # Re-read even if loaded earlier in this session; callers poll while a job runs
+        .populate_existing()
+        .first()
+    )
+    if not result or result.profile_hash != fingerprint:
+        return None
+
+    generated_at = result.updated_at or result.created_at
+    if generated_at and generated_at < datetime.now(timezone.utc) - timedelta(hours=RECOMMENDATION_CACHE_TTL_HOURS):
+        return None
+
+    return [dict(uni) for uni in result.universities]
+
+
+def has_active_job(db: Session, user_id: uuid.UUID, fingerprint: str) -> bool:
+    return (
+        db.query(RecommendationJob.id)
+        .filter(
+            RecommendationJob.user_id == user_id,
+            RecommendationJob.profile_hash == fingerprint,
+            RecommendationJob.status.in_(_ACTIVE_STATUSES),
+        )
+        .first()
+        is not None
+    )
+
+
+# ======================================================
+# ⚙️ Worker
+# ======================================================
+def claim_next_job(db: Session) -> Optional[RecommendationJob]:
+    """Claim the oldest pending job (or one stuck RUNNING past the stale timeout)."""
+    now = datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=RECOMMENDATION_JOB_STALE_SECONDS)
+
+    job = (
+        db.query(RecommendationJob)
+        .filter(
+            or_(
+                RecommendationJob.status == RecommendationJobStatus.PENDING,
+                and_(
+                    RecommendationJob.status == RecommendationJobStatus.RUNNING,
+                    RecommendationJob.started_at < stale_before,
+                ),
+            )
+        )
+        .order_by(RecommendationJob.created_at.asc())
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not job:
+        return None
+
+    job.status = RecommendationJobStatus.RUNNING
+    job.started_at = now
+    job.attempts = (job.attempts or 0) + 1
+    db.commit()
+    return job
+
+
+def _store_result(db: Session, user_id: uuid.UUID, fingerprint: str, universities: List[Dict]) -> None:
+    stmt = pg_insert(AIUniversityResult).values(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        universities=universities,
+        profile_hash=fingerprint,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AIUniversityResult.user_id],
+        set_={
+            "universities": stmt.excluded.universities,
+            "profile_hash": stmt.excluded.profile_hash,
+            "updated_at": datetime.now(timezone.utc),
+        },
+    )
+    db.execute(stmt)
+
+
+def run_job(db: Session, job: RecommendationJob) -> None:
+    """Generate and store recommendations for a claimed job."""
+    try:
+        profile = db.query(Profile).filter(Profile.user_id == job.user_id).first()
+        if not profile:
+            raise RuntimeError("User profile not found")
+
+        # The profile may have changed since the job was queued; generate for what it is now
+        fingerprint = profile_fingerprint(profile)
+
+        universities = get_gemini_recommendations(
+            budget_range=profile.budget_range,
+            target_country=profile.target_country,
+            target_field=profile.target_field,
+            target_degree=profile.target_degree,
+            major=profile.major,
+        )
+        if not universities:
+            raise RuntimeError("Gemini returned no universities")
+
+        universities = bulk_upsert_ai_universities(db, universities)[:12]
+        store_shared_recommendations(db, shared_key_tuple(profile), universities)
+        _store_result(db, job.user_id, fingerprint, universities)
+
+        job.profile_hash = fingerprint
+        job.status = RecommendationJobStatus.DONE
+        job.error = None
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        print(f"[Recommendation Jobs] Precomputed {len(universities)} universities for user {job.user_id}")
+
+    except Exception as e:
+        db.rollback()
+        job.error = str(e)
+        job.finished_at = datetime.now(timezone.utc)
+        if job.attempts >= RECOMMENDATION_JOB_MAX_ATTEMPTS:
+            job.status = RecommendationJobStatus.FAILED
+        else:
+            job.status = RecommendationJobStatus.PENDING
+        db.commit()
+        print(f"❌ Recommendation job {job.id} failed (attempt {job.attempts}): {e}")
+
+
+def process_next_job() -> bool:
+    """Claim and run one job. Returns False when the queue is empty."""
+    db = SessionLocal()
+    try:
+        job = claim_next_job(db)
+        if not job:
+            return False
+        run_job(db, job)
+        return True
+    finally:
+        db.close()
+
+
+class RecommendationWorker:
+    """Polls the job table on a daemon thread until stopped."""
+
+    def __init__(self, poll_seconds: float = RECOMMENDATION_JOB_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            # Clear before claiming: a job committed while this cycle runs sets the
+            # event again, so the wait below returns at once instead of sleeping
+            _job_enqueued.clear()
+            try:
+                if process_next_job():
+                    continue
+            except Exception as e:
+                print(f"❌ Recommendation worker error: {e}")
+            _job_enqueued.wait(self.poll_seconds)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="recommendation-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        _job_enqueued.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+recommendation_worker = RecommendationWorker()
+
+
+if __name__ == "__main__":
+    print("[Recommendation Jobs] Worker started. Press Ctrl+C to stop.")
+    try:
+        recommendation_worker.run_forever()
+    except KeyboardInterrupt:
+        print("[Recommendation Jobs] Worker stopped.")
@@ -0,0 +1,71 @@
+"""
+Shortlist queries shared by the shortlist and counsellor endpoints.
+
+A user's shortlist is always loaded together with its universities in a
+single JOIN, instead of one University lookup per shortlist row.
+"""
+
+import uuid
+from typing import Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager
+
+from app.models.shortlist import Shortlist
+from app.models.university import University
+
+
+def shortlist_with_universities(user_id: uuid.UUID):
+    """SELECT a user's shortlist rows with `Shortlist.university` populated from the same query."""
+    return (
+        select(Shortlist)
+        .join(Shortlist.university)
+        .options(contains_eager(Shortlist.university))
+        .where(Shortlist.user_id == user_id)
+        .order_by(Shortlist.created_at.asc())
+    )
+
+
+def get_user_shortlist(db: Session, user_id: uuid.UUID) -> List[Shortlist]:
+    return list(db.scalars(shortlist_with_universities(user_id)).all())
+
+
+async def get_user_shortlist_async(db: AsyncSession, user_id: uuid.UUID) -> List[Shortlist]:
+    return list((await db.scalars(shortlist_with_universities(user_id))).all())
+
+
+def university_summary(uni: University) -> Dict:
+    """The university fields shown in shortlist responses and the counsellor prompt."""
+    return {
+        "id": str(uni.id),
+        "name": uni.name,
+        "country": uni.country,
+        "degree": uni.degree,
+        "field": uni.field,
+        "estimated_tuition": (uni.tuition_min + uni.tuition_max) // 2,
+        "difficulty": uni.difficulty,
+    }
+
+
+def locked_university_summary(university_data: Dict) -> Dict:
+    """
+    Build the locked-university response from the snapshot taken at lock time.
+    Snapshots from /shortlist/lock store tuition_min/tuition_max, those from
+    /universities/lock store estimated_tuition.
+    """
+    data = dict(university_data or {})
+    if "estimated_tuition" not in data:
+        tuition_min = data.get("tuition_min") or 0
+        tuition_max = data.get("tuition_max") or tuition_min
+        data["estimated_tuition"] = (int(tuition_min) + int(tuition_max)) // 2
+
+    return {
+        "id": data.get("id"),
+        "name": data.get("name"),
+        "country": data.get("country"),
+        "degree": data.get("degree"),
+        "field": data.get("field"),
+        "estimated_tuition": data["estimated_tuition"],
+        "difficulty": data.get("difficulty"),
+    }
@@ -0,0 +1,101 @@
+"""
+Single-flight coalescing for LLM calls.
+
+Concurrent callers that issue the same prompt (same model, prompt text and
+generation config) wait on one upstream call and share its parsed result,
+instead of each paying for a duplicate request. Works for both async callers
+(gemini_service) and sync callers running in threadpool threads (ai_service).
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _SyncCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Deduplicates identical in-flight calls and counts issued vs coalesced calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync_calls: Dict[str, _SyncCall] = {}
+        self._async_calls: Dict[str, asyncio.Task] = {}
+        self.issued = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: Any, config: Optional[Dict] = None) -> str:
+        """Hash (model, prompt, generation config) into a coalescing key."""
+        raw = json.dumps([model, prompt, config or {}], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Run fn once per key across concurrent threads; followers get a copy of its result."""
+        with self._lock:
+            call = self._sync_calls.get(key)
+            leader = call is None
+            if leader:
+                call = _SyncCall()
+                self._sync_calls[key] = call
+                self.issued += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._sync_calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await fn once per key on this event loop; followers get a copy of its result.
+        The upstream call is shielded so one caller disconnecting does not cancel it for the rest.
+        """
+        task = self._async_calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._async_calls[key] = task
+            task.add_done_callback(lambda _: self._async_calls.pop(key, None))
+            with self._lock:
+                self.issued += 1
+            return await asyncio.shield(task)
+
+        with self._lock:
+            self.coalesced += 1
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "issued": self.issued,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._sync_calls) + len(self._async_calls),
+            }
+
+
+# Shared by gemini_service and ai_service
+llm_single_flight = SingleFlight()
@@ -0,0 +1,108 @@
+"""
+University catalog writes.
+
+AI discovery returns a dozen universities per call. Instead of one
+case-insensitive lookup and one flush per name, they are matched on the
+unique (name_normalized, country, degree) key in a single IN query, and the
+missing ones are inserted with one INSERT ... ON CONFLICT DO NOTHING RETURNING.
+"""
+
+import uuid
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.university import University, normalize_university_name
+from app.services.catalog_index import catalog_index
+from app.services.recommendation_cache import catalog_country, catalog_degree, to_int
+
+
+def _ai_university_row(uni: Dict) -> Dict:
+    """Map an AI recommendation onto a `universities` row."""
+    name = uni.get("name", "Unknown University")
+    tuition = to_int(uni.get("estimated_tuition", 20000), 20000)
+    return {
+        "id": uuid.uuid4(),
+        "name": name,
+        "name_normalized": normalize_university_name(name),
+        # Spelled one way so "USA"/"usa" or "Masters"/"Master's" share a catalog key
+        "country": catalog_country(uni.get("country") or "Unknown"),
+        "degree": catalog_degree(uni.get("degree") or "Bachelors"),
+        "field": uni.get("field", "Various"),
+        "tuition_min": tuition,
+        "tuition_max": tuition + 10000,
+        "difficulty": str(uni.get("difficulty", "MEDIUM")).upper(),
+        "generated_by_ai": True,
+    }
+
+
+UniversityKey = Tuple[str, str, str]
+
+# Columns of the unique catalog key, also the ON CONFLICT target for catalog upserts
+UNIVERSITY_KEY_COLUMNS = (University.name_normalized, University.country, University.degree)
+
+
+def university_key(row: Dict) -> UniversityKey:
+    """(name_normalized, country, degree) for a `universities` row dict."""
+    return (row["name_normalized"], row["country"], row["degree"])
+
+
+def _ids_by_key(db: Session, keys: List[UniversityKey]) -> Dict[UniversityKey, uuid.UUID]:
+    rows = db.execute(
+        select(*UNIVERSITY_KEY_COLUMNS, University.id)
+        .where(tuple_(*UNIVERSITY_KEY_COLUMNS).in_(keys))
+    ).all()
+    return {(name, country, degree): uni_id for name, country, degree, uni_id in rows}
+
+
+def bulk_upsert_ai_universities(db: Session, universities: List[Dict]) -> List[Dict]:
+    """
+    Make sure every AI-recommended university exists in the catalog and return
+    the list with database UUIDs in "id". Costs one SELECT, plus one INSERT if
+    any are new (and one more SELECT only if a concurrent request won a race).
+    """
+    if not universities:
+        return []
+
+    rows = [_ai_university_row(uni) for uni in universities]
+    keys = [university_key(row) for row in rows]
+    unique_keys = list(dict.fromkeys(keys))
+
+    ids = _ids_by_key(db, unique_keys)
+
+    missing = [key for key in unique_keys if key not in ids]
+    if missing:
+        first_by_key = {}
+        for key, row in zip(keys, rows):
+            first_by_key.setdefault(key, row)
+
+        new_rows = {key: first_by_key[key] for key in missing}
+        stmt = (
+            pg_insert(University)
+            .values(list(new_rows.values()))
+            .on_conflict_do_nothing(index_elements=list(UNIVERSITY_KEY_COLUMNS))
+            .returning(*UNIVERSITY_KEY_COLUMNS, University.id)
+        )
+        inserted = []
+        for name, country, degree, uni_id in db.execute(stmt):
+            ids[(name, country, degree)] = uni_id
+            inserted.append(new_rows[(name, country, degree)])
+
+        # Rows skipped by ON CONFLICT were inserted by someone else in the meantime
+        raced = [key for key in missing if key not in ids]
+        if raced:
+            ids.update(_ids_by_key(db, raced))
+
+    db.commit()
+
+    if missing and inserted:
+        # Make new rows searchable in this process without waiting for the next refresh
+        catalog_index.add_rows(inserted)
+
+    return [
+        {**uni, "id": str(ids[key])}
+        for key, uni in zip(keys, universities)
+        if key in ids
+    ]
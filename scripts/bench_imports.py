@@ -0,0 +1,79 @@
+"""
+Benchmark: import-time cost of the API, per module.
+
+Imports a module (default `app.main`) in a fresh interpreter with
+`python -X importtime` and reports the total import time plus the modules
+with the highest cumulative and self import cost.
+
+FAST_START=true is set by default so the import does not run create_all;
+pass --no-fast-start to measure the full path.
+
+Usage:
+    python scripts/bench_imports.py [--module app.main] [--top 25] [--no-fast-start]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_importtime(module: str, fast_start: bool):
+    env = dict(os.environ)
+    if fast_start:
+        env["FAST_START"] = "true"
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:], file=sys.stderr)
+        sys.exit(f"Importing {module} failed")
+
+    # Lines look like: "import time:       123 |       4567 |     package.module"
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="module to import")
+    parser.add_argument("--top", type=int, default=25, help="number of modules to list")
+    parser.add_argument("--no-fast-start", action="store_true", help="don't set FAST_START=true")
+    args = parser.parse_args()
+
+    rows = run_importtime(args.module, fast_start=not args.no_fast_start)
+    if not rows:
+        sys.exit("No import timings captured")
+
+    total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+    print(f"Importing {args.module}: {total_ms:.1f} ms across {len(rows)} modules\n")
+
+    print(f"Top {args.top} by cumulative time (module + its imports):")
+    for name, _, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {name.strip()}")
+
+    print(f"\nTop {args.top} by self time:")
+    for name, self_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {name.strip()}")
+
+    app_rows = [r for r in rows if r[0].strip().startswith("app.")]
+    if app_rows:
+        print("\napp.* modules by cumulative time:")
+        for name, _, cumulative_us in sorted(app_rows, key=lambda r: r[2], reverse=True):
+            print(f"  {cumulative_us / 1000:9.1f} ms  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark: saving one discover call's universities, legacy path vs bulk upsert.
+
+Builds a throwaway `bench_upsert` schema with a 100k-row universities catalog,
+then saves 12 AI recommendations (6 already in the catalog, 6 new) with:
+
+- legacy: one `name ILIKE` query + one flush per university (the old
+  `_save_ai_universities_to_db`)
+- bulk:   `bulk_upsert_ai_universities` (one IN query + one INSERT ... RETURNING)
+
+and reports the number of database round trips and wall time for each.
+
+Everything happens inside the `bench_upsert` schema, but like
+explain_hot_queries.py the script refuses to run against DATABASE_URL: pass
+a dedicated scratch database with --database-url (or EXPLAIN_DATABASE_URL).
+
+Usage:
+    python scripts/bench_university_upsert.py --database-url postgresql://.../scratch [--rows 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.university import University, normalize_university_name
+from app.services.university_service import bulk_upsert_ai_universities
+
+SCHEMA = "bench_upsert"
+
+
+def seed_catalog(engine, rows: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    # Unqualified tables map to the scratch schema, so nothing touches public.*
+    University.__table__.create(bind=engine.execution_options(schema_translate_map={None: SCHEMA}))
+
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            name = f"Catalog University {i}"
+            batch.append({
+                "id": uuid.uuid4(),
+                "name": name,
+                "name_normalized": normalize_university_name(name),
+                "country": "USA",
+                "degree": "Masters",
+                "field": "Computer Science",
+                "tuition_min": 20000,
+                "tuition_max": 30000,
+                "difficulty": "MEDIUM",
+                "generated_by_ai": False,
+            })
+            if len(batch) == 5000:
+                conn.execute(University.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(University.__table__.insert(), batch)
+        conn.execute(text(f"ANALYZE {SCHEMA}.universities"))
+
+
+def recommendations(tag: str):
+    existing = [{"name": f"catalog university {i * 7919}", "country": "USA", "degree": "Masters"} for i in range(6)]
+    new = [{"name": f"New {tag} University {i}", "country": "UK", "estimated_tuition": 25000} for i in range(6)]
+    return existing + new
+
+
+def legacy_save(db, universities):
+    """The pre-bulk implementation, kept here for comparison."""
+    saved = []
+    for uni in universities:
+        uni_name = uni.get("name", "Unknown University")
+        existing = db.query(University).filter(University.name.ilike(uni_name)).first()
+        if existing:
+            saved.append({**uni, "id": str(existing.id)})
+        else:
+            new_uni = University(
+                id=uuid.uuid4(),
+                name=uni_name,
+                country=uni.get("country", "Unknown"),
+                degree=uni.get("degree", "Bachelors"),
+                field=uni.get("field", "Various"),
+                tuition_min=int(uni.get("estimated_tuition", 20000)),
+                tuition_max=int(uni.get("estimated_tuition", 20000)) + 10000,
+                difficulty=uni.get("difficulty", "MEDIUM").upper(),
+                generated_by_ai=True,
+            )
+            db.add(new_uni)
+            db.flush()
+            saved.append({**uni, "id": str(new_uni.id)})
+    db.commit()
+    return saved
+
+
+def measure(engine, label, fn, universities):
+    counter = {"statements": 0}
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    db = Session()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        start = time.perf_counter()
+        saved = fn(db, universities)
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+        db.close()
+
+    print(f"{label:<8} {len(saved):>3} universities  {counter['statements']:>3} round trips  {elapsed:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("EXPLAIN_DATABASE_URL"),
+        help="dedicated scratch database to seed (default: EXPLAIN_DATABASE_URL)",
+    )
+    parser.add_argument("--rows", type=int, default=100_000, help="catalog size to seed")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("pass --database-url (or set EXPLAIN_DATABASE_URL) to a scratch database; DATABASE_URL is never used")
+    if args.database_url == os.getenv("DATABASE_URL"):
+        parser.error("--database-url is the application's DATABASE_URL; use a dedicated scratch database")
+
+    # Only the scratch schema is on the search path, so no public table can be seen or written
+    engine = create_engine(args.database_url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+
+    print(f"Seeding {args.rows} universities into schema '{SCHEMA}'...")
+    seed_catalog(engine, args.rows)
+
+    try:
+        measure(engine, "legacy", legacy_save, recommendations("legacy"))
+        measure(engine, "bulk", bulk_upsert_ai_universities, recommendations("bulk"))
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
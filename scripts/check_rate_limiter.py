@@ -0,0 +1,85 @@
+"""
+Exercise the AI rate limiter backends.
+
+Runs the same sliding-window scenario against the in-memory backend (with a
+simulated clock) and, if --redis-url is given, against a Redis server such
+as a local `redis-server` or a container. The Redis run uses throwaway keys
+and real time, so it takes about --window seconds.
+
+Checks that:
+- exactly `limit` requests are allowed within a window and the next is
+  rejected with a positive retry-after
+- requests are allowed again once the window has slid past the oldest one
+- separate users and policies have separate quotas
+- the in-memory backend evicts least recently seen keys past max_keys
+
+Usage:
+    python scripts/check_rate_limiter.py [--redis-url redis://localhost:6379/15] [--window 2]
+
+Exits with status 1 on the first failed check.
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.rate_limit import InMemoryRateLimitBackend, RedisRateLimitBackend
+
+
+def expect(condition: bool, message: str):
+    if not condition:
+        print(f"❌ {message}")
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def run_scenario(backend, label: str, limit: int, window: float, advance):
+    prefix = f"check:{uuid.uuid4().hex}"
+    user_a, user_b = f"{prefix}:chat:a", f"{prefix}:chat:b"
+
+    results = [backend.hit(user_a, limit, window) for _ in range(limit)]
+    expect(all(r.allowed for r in results), f"[{label}] first {limit} requests allowed")
+    expect([r.remaining for r in results] == list(range(limit - 1, -1, -1)), f"[{label}] remaining counts down")
+
+    rejected = backend.hit(user_a, limit, window)
+    expect(not rejected.allowed and 0 < rejected.retry_after <= window, f"[{label}] request {limit + 1} rejected with retry-after")
+
+    expect(backend.hit(user_b, limit, window).allowed, f"[{label}] other user has its own quota")
+    expect(backend.hit(f"{prefix}:sop:a", limit, window).allowed, f"[{label}] other policy has its own quota")
+
+    advance(window + 0.05)
+    expect(backend.hit(user_a, limit, window).allowed, f"[{label}] allowed again after the window slides")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", help="also check the Redis backend against this server")
+    parser.add_argument("--limit", type=int, default=3)
+    parser.add_argument("--window", type=float, default=2.0, help="window in seconds")
+    args = parser.parse_args()
+
+    now = [1000.0]
+
+    def advance(seconds):
+        now[0] += seconds
+
+    memory = InMemoryRateLimitBackend(max_keys=2, clock=lambda: now[0])
+    run_scenario(memory, "memory", args.limit, args.window, advance)
+    expect(memory.stats()["keys"] <= 2, "[memory] keys bounded by max_keys")
+
+    if args.redis_url:
+        import redis
+
+        client = redis.Redis.from_url(args.redis_url)
+        client.ping()
+        backend = RedisRateLimitBackend(client)
+        run_scenario(backend, "redis", args.limit, args.window, time.sleep)
+        expect(backend.errors == 0, "[redis] no fallback to the in-memory backend")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Check that the shortlist read paths issue a constant number of queries.
+
+Builds a throwaway `query_check` schema from the app's models, seeds one
+user with a profile and a growing shortlist, and counts the SQL statements
+run by GET /shortlist (the route handler, on the async engine) and by the
+counsellor's get_user_context (sync engine) at each shortlist size. Counting
+uses the same engine hooks as the per-request instrumentation
+(app.db.instrumentation), so the numbers match the Server-Timing header.
+
+Fails if the statement count grows with the shortlist (an N+1 regression)
+or exceeds the expected budget. Like explain_hot_queries.py it refuses to
+run against DATABASE_URL: pass a dedicated scratch database with
+--database-url (or EXPLAIN_DATABASE_URL).
+
+Usage:
+    python scripts/check_shortlist_queries.py --database-url postgresql://.../scratch
+
+Exits with status 1 on the first failed check.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+from typing import Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, delete, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+import app.db.init_db  # noqa: F401  (imports every model so create_all builds all tables)
+from app.api.ai_counsellor import get_user_context
+from app.api.shortlist_api import get_shortlist
+from app.db.async_session import to_async_url
+from app.db.base import Base
+from app.db.instrumentation import instrument_engine, track_sql
+from app.models.profile import Profile
+from app.models.shortlist import Shortlist
+from app.models.university import University
+from app.models.user import User
+
+SCHEMA = "query_check"
+SHORTLIST_SIZES = (1, 3, 7)
+
+# Expected statements per call: the shortlist JOIN for GET /shortlist;
+# profile, locked university and the shortlist JOIN for get_user_context
+BUDGETS = {
+    "GET /shortlist": 1,
+    "get_user_context": 3,
+}
+
+
+def expect(condition: bool, message: str):
+    if not condition:
+        print(f"❌ {message}")
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def seed(engine) -> User:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    # Unqualified tables map to the scratch schema, so nothing touches public.*
+    Base.metadata.create_all(bind=engine.execution_options(schema_translate_map={None: SCHEMA}))
+
+    with Session(engine, expire_on_commit=False) as db:
+        user = User(email=f"query-check-{uuid.uuid4().hex}@example.com", password_hash="x", stage="SHORTLISTING")
+        db.add(user)
+        db.flush()
+        db.add(Profile(
+            user_id=user.id, first_name="Query", last_name="Check", education_level="Bachelors",
+            major="Computer Science", graduation_year=2024, target_degree="Masters",
+            target_field="Computer Science", target_country="USA", budget_range="20000-50000",
+        ))
+        db.add_all([
+            University(
+                name=f"University {i}", country="USA", degree="Masters", field="Computer Science",
+                tuition_min=20000, tuition_max=30000, difficulty="MEDIUM",
+            )
+            for i in range(max(SHORTLIST_SIZES))
+        ])
+        db.commit()
+    return user
+
+
+def set_shortlist_size(engine, user: User, size: int):
+    with Session(engine) as db:
+        db.execute(delete(Shortlist).where(Shortlist.user_id == user.id))
+        university_ids = db.scalars(text("SELECT id FROM universities ORDER BY name LIMIT :n"), {"n": size}).all()
+        db.add_all([Shortlist(user_id=user.id, university_id=uid) for uid in university_ids])
+        db.commit()
+
+
+def count_get_user_context(engine, user: User) -> Tuple[int, int]:
+    with Session(engine) as db, track_sql() as stats:
+        context = get_user_context(db, user)
+    return stats.statements, len(context["shortlisted"])
+
+
+async def count_get_shortlist(async_engine, user: User) -> Tuple[int, int]:
+    async with AsyncSession(async_engine) as db:
+        with track_sql() as stats:
+            response = await get_shortlist(db=db, user=user)
+    return stats.statements, response["count"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("EXPLAIN_DATABASE_URL"),
+        help="dedicated scratch database to seed (default: EXPLAIN_DATABASE_URL)",
+    )
+    parser.add_argument("--keep", action="store_true", help="keep the seeded schema afterwards")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("pass --database-url (or set EXPLAIN_DATABASE_URL) to a scratch database; DATABASE_URL is never used")
+    if args.database_url == os.getenv("DATABASE_URL"):
+        parser.error("--database-url is the application's DATABASE_URL; use a dedicated scratch database")
+
+    search_path = f"-csearch_path={SCHEMA}"
+    engine = create_engine(args.database_url, connect_args={"options": search_path})
+    async_url, async_connect_args = to_async_url(args.database_url)
+    # NullPool: each size runs in its own asyncio.run, and pooled asyncpg connections are bound to one loop
+    async_engine = create_async_engine(
+        async_url,
+        poolclass=NullPool,
+        connect_args={**async_connect_args, "server_settings": {"search_path": SCHEMA}},
+    )
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+
+    user = seed(engine)
+    counts = {label: {} for label in BUDGETS}
+    try:
+        for size in SHORTLIST_SIZES:
+            set_shortlist_size(engine, user, size)
+
+            statements, returned = count_get_user_context(engine, user)
+            expect(returned == size, f"get_user_context returned {size} shortlisted universities")
+            counts["get_user_context"][size] = statements
+
+            statements, returned = asyncio.run(count_get_shortlist(async_engine, user))
+            expect(returned == size, f"GET /shortlist returned {size} universities")
+            counts["GET /shortlist"][size] = statements
+    finally:
+        asyncio.run(async_engine.dispose())
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+    print()
+    for label, by_size in counts.items():
+        print(f"{label:<20} " + "  ".join(f"{size} items: {n} queries" for size, n in by_size.items()))
+    print()
+
+    for label, by_size in counts.items():
+        expect(len(set(by_size.values())) == 1, f"{label} query count does not grow with the shortlist")
+        expect(max(by_size.values()) <= BUDGETS[label], f"{label} runs at most {BUDGETS[label]} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Check that per-user hot-path queries are served by indexes.
+
+Builds a throwaway `explain_hot` schema from the app's models (so it has the
+same indexes init_db creates), seeds it with a large dataset, ANALYZEs it,
+then runs EXPLAIN on each hot query and fails if any plan contains a
+sequential scan on the queried table.
+
+All tables are created and seeded inside the `explain_hot` schema only, but
+the script still refuses to run against DATABASE_URL: pass a dedicated
+scratch database with --database-url (or EXPLAIN_DATABASE_URL).
+
+Usage:
+    python scripts/explain_hot_queries.py --database-url postgresql://.../scratch [--users 20000]
+
+Exits with status 1 if any query falls back to a sequential scan.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+import app.db.init_db  # noqa: F401  (imports every model so create_all builds all tables)
+from app.db.base import Base
+
+SCHEMA = "explain_hot"
+
+HOT_QUERIES = {
+    "shortlist duplicate check": (
+        "shortlists",
+        "SELECT * FROM shortlists WHERE user_id = :user_id AND university_id = :university_id",
+    ),
+    "shortlist with universities": (
+        "shortlists",
+        """
+        SELECT s.*, u.* FROM shortlists s
+        JOIN universities u ON u.id = s.university_id
+        WHERE s.user_id = :user_id
+        ORDER BY s.created_at
+        """,
+    ),
+    "latest counsellor message": (
+        "ai_counsellor_chats",
+        "SELECT * FROM ai_counsellor_chats WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 1",
+    ),
+    "counsellor conversation": (
+        "ai_counsellor_chats",
+        """
+        SELECT * FROM ai_counsellor_chats
+        WHERE user_id = :user_id AND conversation_id = :conversation_id
+        ORDER BY created_at
+        """,
+    ),
+    "dashboard pending tasks": (
+        "tasks",
+        "SELECT count(*) FROM tasks WHERE user_id = :user_id AND status IN ('todo', 'in_progress')",
+    ),
+    "profile by user": (
+        "profiles",
+        "SELECT * FROM profiles WHERE user_id = :user_id",
+    ),
+    "cached recommendations": (
+        "cached_recommendations",
+        """
+        SELECT * FROM cached_recommendations
+        WHERE user_id = :user_id AND profile_hash = :profile_hash
+        ORDER BY rank
+        """,
+    ),
+}
+
+
+def seed(engine, users: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    # Unqualified tables map to the scratch schema, so nothing touches public.*
+    Base.metadata.create_all(bind=engine.execution_options(schema_translate_map={None: SCHEMA}))
+
+    statements = [
+        f"""
+        INSERT INTO users (id, email, password_hash, stage, is_active)
+        SELECT gen_random_uuid(), 'user' || g || '@example.com', 'x', 'DISCOVERY', true
+        FROM generate_series(1, {users}) g
+        """,
+        """
+        INSERT INTO universities (id, name, name_normalized, country, degree, field,
+                                  tuition_min, tuition_max, difficulty, generated_by_ai)
+        SELECT gen_random_uuid(), 'University ' || g, 'university ' || g, 'USA', 'Masters',
+               'Computer Science', 20000, 30000, 'MEDIUM', false
+        FROM generate_series(1, 5000) g
+        """,
+        """
+        INSERT INTO profiles (id, user_id, first_name, last_name, education_level, major,
+                              graduation_year, target_degree, target_field, target_country,
+                              budget_range, is_complete)
+        SELECT gen_random_uuid(), id, 'First', 'Last', 'Bachelors', 'Computer Science',
+               2024, 'Masters', 'Computer Science', 'USA', '20000-50000', true
+        FROM users
+        """,
+        """
+        INSERT INTO shortlists (id, user_id, university_id, is_locked)
+        SELECT gen_random_uuid(), u.id, uni.id, false
+        FROM users u
+        CROSS JOIN LATERAL (
+            SELECT id FROM universities ORDER BY id OFFSET abs(hashtext(u.id::text)) % 4990 LIMIT 5
+        ) uni
+        """,
+        """
+        INSERT INTO ai_counsellor_chats (id, user_id, conversation_id, role, content, created_at)
+        SELECT gen_random_uuid(), u.id, c.conversation_id,
+               CASE WHEN m % 2 = 0 THEN 'user' ELSE 'assistant' END, 'message ' || m,
+               now() - (m || ' minutes')::interval
+        FROM users u
+        CROSS JOIN LATERAL (
+            SELECT gen_random_uuid() AS conversation_id FROM generate_series(1, 2) WHERE u.id IS NOT NULL
+        ) c
+        CROSS JOIN generate_series(1, 10) m
+        """,
+        """
+        INSERT INTO tasks (id, user_id, title, status)
+        SELECT gen_random_uuid(), u.id, 'Task ' || t,
+               (ARRAY['todo', 'in_progress', 'completed'])[1 + t % 3]
+        FROM users u CROSS JOIN generate_series(1, 8) t
+        """,
+        """
+        INSERT INTO cached_recommendations (id, user_id, university_id, university_name, country,
+                                            degree, field, estimated_tuition, difficulty,
+                                            profile_hash, rank, created_at)
+        SELECT gen_random_uuid(), s.user_id, s.university_id, 'University', 'USA', 'Masters',
+               'Computer Science', 25000, 'MEDIUM', md5(s.user_id::text), row_number() OVER (), now()
+        FROM shortlists s
+        """,
+    ]
+
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+        conn.execute(text("ANALYZE"))
+
+
+def sample_params(engine):
+    with engine.connect() as conn:
+        row = conn.execute(text("""
+            SELECT s.user_id, s.university_id, c.conversation_id, md5(s.user_id::text) AS profile_hash
+            FROM shortlists s
+            JOIN ai_counsellor_chats c ON c.user_id = s.user_id
+            LIMIT 1
+        """)).mappings().one()
+    return dict(row)
+
+
+def seq_scans(plan, table):
+    """Yield Seq Scan nodes on `table` anywhere in an EXPLAIN (FORMAT JSON) plan."""
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == table:
+        yield plan
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child, table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("EXPLAIN_DATABASE_URL"),
+        help="dedicated scratch database to seed (default: EXPLAIN_DATABASE_URL)",
+    )
+    parser.add_argument("--users", type=int, default=20_000, help="number of users to seed")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded schema afterwards")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("pass --database-url (or set EXPLAIN_DATABASE_URL) to a scratch database; DATABASE_URL is never used")
+    if args.database_url == os.getenv("DATABASE_URL"):
+        parser.error("--database-url is the application's DATABASE_URL; use a dedicated scratch database")
+
+    # Only the scratch schema is on the search path: gen_random_uuid and hashtext live in pg_catalog,
+    # which is always searched, and no public table can be seen or written
+    engine = create_engine(args.database_url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+
+    print(f"Seeding {args.users} users into schema '{SCHEMA}'...")
+    seed(engine, args.users)
+
+    failures = 0
+    try:
+        params = sample_params(engine)
+        with engine.connect() as conn:
+            for label, (table, sql) in HOT_QUERIES.items():
+                plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                root = plan[0]["Plan"]
+                scans = list(seq_scans(root, table))
+                status = "SEQ SCAN" if scans else "ok"
+                failures += bool(scans)
+                print(f"{label:<30} {table:<24} {status:<9} (cost {root['Total Cost']:.1f})")
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+    if failures:
+        print(f"\n{failures} hot quer{'y' if failures == 1 else 'ies'} fell back to a sequential scan")
+        sys.exit(1)
+    print("\nAll hot queries use an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Bulk-import a university program catalog from CSV or JSON Lines.
+
+Rows are streamed from the file, so large catalogs are never held in memory,
+and upserted on the (name_normalized, country, degree) catalog key: re-running
+the same file is a no-op, and changed rows are updated in place.
+
+Expected fields (CSV header or JSON keys):
+    name, country, degree, field, tuition_min, tuition_max, difficulty
+`estimated_tuition` is accepted in place of tuition_min/tuition_max. Rows
+without a name, country or degree are skipped and counted as rejected.
+
+Methods:
+    copy    (default) COPY each chunk into a temp table, then one
+            INSERT ... SELECT ... ON CONFLICT DO UPDATE per chunk
+    insert  batched multi-row INSERT ... ON CONFLICT DO UPDATE
+
+Usage:
+    python scripts/import_universities.py catalog.csv
+    python scripts/import_universities.py catalog.jsonl --method insert --batch-size 2000
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import literal_column, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.session import engine
+from app.models.university import University, normalize_university_name
+from app.services.recommendation_cache import catalog_country, catalog_degree, to_int
+from app.services.university_service import UNIVERSITY_KEY_COLUMNS, university_key
+
+COLUMNS = ["name", "name_normalized", "country", "degree", "field", "tuition_min", "tuition_max", "difficulty"]
+UPDATE_COLUMNS = ["name", "field", "tuition_min", "tuition_max", "difficulty"]
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.rejected = 0
+        self.inserted = 0
+        self.updated = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / max(self.elapsed, 1e-9)
+
+    @property
+    def unchanged(self) -> int:
+        return self.read - self.rejected - self.inserted - self.updated
+
+
+# =========================
+# READING
+# =========================
+
+def _read_raw(path: str, fmt: str) -> Iterator[Dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def to_university_row(raw: Dict) -> Optional[Dict]:
+    """Map one input record onto a `universities` row, or None if it lacks the key fields."""
+    name = " ".join(str(raw.get("name") or "").split())
+    if not (name and str(raw.get("country") or "").strip() and str(raw.get("degree") or "").strip()):
+        return None
+    # Same spellings as AI-discovered rows, so both land on one catalog key
+    country = catalog_country(raw["country"])
+    degree = catalog_degree(raw["degree"])
+
+    estimated = to_int(raw.get("estimated_tuition"), None)
+    tuition_min = to_int(raw.get("tuition_min"), estimated if estimated is not None else 0)
+    tuition_max = to_int(raw.get("tuition_max"), tuition_min if estimated is None else estimated + 10000)
+
+    return {
+        "name": name,
+        "name_normalized": normalize_university_name(name),
+        "country": country,
+        "degree": degree,
+        "field": str(raw.get("field") or "Various").strip(),
+        "tuition_min": tuition_min,
+        "tuition_max": max(tuition_min, tuition_max),
+        "difficulty": str(raw.get("difficulty") or "MEDIUM").strip().upper(),
+    }
+
+
+def read_chunks(path: str, fmt: str, size: int, stats: ImportStats) -> Iterator[List[Dict]]:
+    """
+    Yield lists of at most `size` rows. Duplicate keys within a chunk keep the
+    last occurrence, since one upsert statement cannot touch the same row twice.
+    """
+    chunk: Dict = {}
+    for raw in _read_raw(path, fmt):
+        stats.read += 1
+        row = to_university_row(raw)
+        if row is None:
+            stats.rejected += 1
+            continue
+        chunk[university_key(row)] = row
+        if len(chunk) >= size:
+            yield list(chunk.values())
+            chunk = {}
+    if chunk:
+        yield list(chunk.values())
+
+
+# =========================
+# LOADING
+# =========================
+
+_CHANGED = " OR ".join(f"universities.{c} IS DISTINCT FROM EXCLUDED.{c}" for c in UPDATE_COLUMNS)
+_SET = ", ".join(f"{c} = EXCLUDED.{c}" for c in UPDATE_COLUMNS)
+_KEY = ", ".join(c.name for c in UNIVERSITY_KEY_COLUMNS)
+
+
+def load_with_copy(chunks: Iterator[List[Dict]], stats: ImportStats) -> None:
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("""
+            CREATE TEMP TABLE universities_import (
+                name VARCHAR, name_normalized VARCHAR, country VARCHAR, degree VARCHAR, field VARCHAR,
+                tuition_min INTEGER, tuition_max INTEGER, difficulty VARCHAR
+            ) ON COMMIT DELETE ROWS
+        """)
+        for chunk in chunks:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in chunk:
+                writer.writerow([row[c] for c in COLUMNS])
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY universities_import ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+            # Rows with no changes are skipped by the WHERE, so re-imports write nothing
+            cursor.execute(f"""
+                INSERT INTO universities (id, {', '.join(COLUMNS)}, generated_by_ai)
+                SELECT gen_random_uuid(), {', '.join(COLUMNS)}, false FROM universities_import
+                ON CONFLICT ({_KEY}) DO UPDATE SET {_SET}
+                WHERE {_CHANGED}
+                RETURNING (xmax = 0) AS inserted
+            """)
+            _count_upserted(cursor.fetchall(), stats)
+            # ON COMMIT DELETE ROWS empties the temp table for the next chunk
+            raw.commit()
+            _progress(stats)
+        cursor.close()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def load_with_insert(chunks: Iterator[List[Dict]], stats: ImportStats) -> None:
+    table = University.__table__
+    for chunk in chunks:
+        stmt = pg_insert(table).values([{**row, "generated_by_ai": False} for row in chunk])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in UNIVERSITY_KEY_COLUMNS],
+            set_={c: stmt.excluded[c] for c in UPDATE_COLUMNS},
+            where=or_(*(table.c[c].is_distinct_from(stmt.excluded[c]) for c in UPDATE_COLUMNS)),
+        ).returning(literal_column("(xmax = 0)"))
+        with engine.begin() as conn:
+            _count_upserted(conn.execute(stmt).fetchall(), stats)
+        _progress(stats)
+
+
+def _count_upserted(rows, stats: ImportStats) -> None:
+    # RETURNING (xmax = 0) is true for inserted rows and false for updated ones
+    inserted = sum(1 for (is_insert,) in rows if is_insert)
+    stats.inserted += inserted
+    stats.updated += len(rows) - inserted
+
+
+def _progress(stats: ImportStats) -> None:
+    print(f"  {stats.read:>9} rows read  {stats.rows_per_second:>10.0f} rows/s", end="\r", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV or JSON Lines file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="input format (default: from the file extension)")
+    parser.add_argument("--method", choices=["copy", "insert"], default="copy", help="load method")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="rows per COPY chunk / INSERT statement")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    load = load_with_copy if args.method == "copy" else load_with_insert
+
+    print(f"Importing {args.path} ({fmt}, {args.method}, batches of {args.batch_size})...")
+    stats = ImportStats()
+    load(read_chunks(args.path, fmt, args.batch_size, stats), stats)
+
+    print(" " * 60, end="\r")
+    print(f"✅ {stats.read} rows in {stats.elapsed:.2f}s ({stats.rows_per_second:.0f} rows/s)")
+    print(f"   inserted {stats.inserted}, updated {stats.updated}, unchanged {stats.unchanged}, rejected {stats.rejected}")
+    print("   Running API workers pick up new rows on their next catalog refresh; restart them to see updated rows.")
+
+
+if __name__ == "__main__":
+    main()
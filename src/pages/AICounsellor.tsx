@@ -58,13 +58,22 @@ export default function AICounsellorPage() {
   const [isTyping, setIsTyping] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  // Cursor for the page of messages before the oldest one shown (null when there are none)
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  // Prepending older messages should not jump the view to the bottom
+  const skipNextScrollRef = useRef(false);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
   useEffect(() => {
+    if (skipNextScrollRef.current) {
+      skipNextScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -82,6 +91,7 @@ export default function AICounsellorPage() {
       if (response.messages && response.messages.length > 0) {
         setMessages(response.messages);
         setConversationId(response.conversation_id);
+        setOlderCursor(response.has_more ? response.next_cursor : null);
       }
     } catch (err: any) {
       console.error('[AICounsellor] Failed to load chat history:', err);
@@ -91,6 +101,25 @@ export default function AICounsellorPage() {
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!olderCursor || !conversationId || isLoadingOlder) return;
+    try {
+      setIsLoadingOlder(true);
+      const response = await aiCounsellorService.getChatHistory({
+        cursor: olderCursor,
+        conversationId
+      });
+      skipNextScrollRef.current = true;
+      setMessages(prev => [...response.messages, ...prev]);
+      setOlderCursor(response.has_more ? response.next_cursor : null);
+    } catch (err: any) {
+      console.error('[AICounsellor] Failed to load older messages:', err);
+      setError(err.response?.data?.detail || err.message || 'Failed to load older messages');
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  };
+
   const handleSendMessage = async (content: string) => {
     if (!content.trim() || isTyping) return;
 
@@ -154,6 +183,7 @@ export default function AICounsellorPage() {
 
       setMessages([greetingMessage]);
       setConversationId(response.conversation_id);
+      setOlderCursor(null);
     } catch (err: any) {
       console.error('[AICounsellor] Failed to start new conversation:', err);
       setError('Failed to start new conversation');
@@ -261,6 +291,20 @@ export default function AICounsellorPage() {
             /* Chat Messages */
             <div className="flex-1 overflow-y-auto px-8 py-6">
               <div className="max-w-4xl mx-auto">
+                {olderCursor && (
+                  <div className="flex justify-center mb-4">
+                    <Button
+                      variant="secondary"
+                      size="sm"
+                      onClick={loadOlderMessages}
+                      disabled={isLoadingOlder}
+                      className="flex items-center gap-2"
+                    >
+                      {isLoadingOlder && <Loader2 className="w-4 h-4 animate-spin" />}
+                      Load older messages
+                    </Button>
+                  </div>
+                )}
                 {messages.map((message) => (
                   <ChatMessageComponent key={message.id} message={message} />
                 ))}
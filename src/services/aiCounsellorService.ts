@@ -10,6 +10,15 @@ export interface ChatMessage {
 export interface ChatHistoryResponse {
   messages: ChatMessage[];
   conversation_id: string | null;
+  // Pass back as `cursor` to load older messages
+  next_cursor: string | null;
+  has_more: boolean;
+}
+
+export interface ChatHistoryParams {
+  cursor?: string;
+  limit?: number;
+  conversationId?: string;
 }
 
 export interface SendMessageResponse {
@@ -24,9 +33,15 @@ export interface NewConversationResponse {
 }
 
 const aiCounsellorService = {
-  // Get chat history for the current user
-  getChatHistory: async (): Promise<ChatHistoryResponse> => {
-    const response = await apiClient.get('/ai/counsellor/history');
+  // Get a page of chat history for the current user (newest page by default)
+  getChatHistory: async (params: ChatHistoryParams = {}): Promise<ChatHistoryResponse> => {
+    const response = await apiClient.get('/ai/counsellor/history', {
+      params: {
+        cursor: params.cursor,
+        limit: params.limit,
+        conversation_id: params.conversationId
+      }
+    });
     return response.data;
   },
 
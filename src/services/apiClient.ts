@@ -20,7 +20,14 @@ apiClient.interceptors.request.use((config: InternalAxiosRequestConfig) => {
 
 // Response interceptor to handle auth errors globally
 apiClient.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    // Endpoints that change the user's stage return a reissued token
+    const token = response.data?.access_token;
+    if (typeof token === 'string' && token) {
+      localStorage.setItem('access_token', token);
+    }
+    return response;
+  },
   (error: AxiosError) => {
     if (error.response?.status === 401) {
       // Clear token on 401 and redirect to login